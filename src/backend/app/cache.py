@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+
+from .config import Config
+
+class ByteLRUCache:
+    """
+    Thread-safe LRU cache of serialized responses, bounded by total byte size.
+
+    Values must be ``bytes``-like. Entries larger than the whole budget are
+    never stored. Hit, miss and eviction counters are kept for ``stats()``.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, count=True):
+        """Cached value of `key` or None; `count=False` leaves the hit/miss stats alone."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                if count:
+                    self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+            return value
+
+    def put(self, key, value):
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.current_bytes -= len(old)
+            self._entries[key] = value
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+                self.evictions += 1
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def evict_where(self, predicate):
+        """Drop every entry whose key matches `predicate`."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                self.current_bytes -= len(self._entries.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+class _Flight:
+    def __init__(self, key):
+        self.key = key
+        self.value = None
+        self.done = threading.Event()
+
+class SingleFlight:
+    """
+    Coalesce concurrent computations of the same key.
+
+    The first caller of ``join(key)`` becomes the leader and must ``land()``
+    its flight when done, with the result or with None if it failed or can't
+    be shared. Callers joining meanwhile get the same flight and ``wait()``
+    for the leader's value; on None they compute it themselves.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def join(self, key):
+        """Return (flight, is_leader) for `key`."""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = _Flight(key)
+            return flight, True
+
+    def wait(self, flight, timeout=None):
+        flight.done.wait(timeout)
+        value = flight.value
+        if value is not None:
+            with self._lock:
+                self.coalesced += 1
+        return value
+
+    def land(self, flight, value=None):
+        """Publish the leader's result and release the waiters. Idempotent."""
+        with self._lock:
+            if flight.done.is_set():
+                return
+            if self._flights.get(flight.key) is flight:
+                del self._flights[flight.key]
+            flight.value = value
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._flights), 'coalesced': self.coalesced}
+
+class RecentKeys:
+    """Thread-safe bounded set of keys; the least recently added are forgotten first."""
+
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, key):
+        with self._lock:
+            self._keys[key] = None
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_keys:
+                self._keys.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._keys
+
+# Arrow IPC bytes of /api/data responses
+tile_cache = ByteLRUCache(Config.TILE_CACHE_MAX_BYTES)
+# /api/data keys whose payload exceeded TILE_CACHE_MAX_ENTRY_BYTES; streamed without coalescing
+oversized_keys = RecentKeys(1024)
+# In-progress /api/data cache misses, by cache key
+data_flights = SingleFlight()
@@ -0,0 +1,63 @@
+import base64
+import json
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+class DateAxisError(ValueError):
+    """Raised when the points of a selection do not share one date axis."""
+
+def date_axis_matrix(table):
+    """
+    Return (dates, values) for a selection result whose points share one
+    date axis: the ISO date strings of the first point and a flat float32
+    array of the row-major (points x dates) displacement matrix, with NaN
+    for missing values. Raises DateAxisError if the series lengths differ.
+    """
+    if table.num_rows == 0:
+        return [], pa.array([], pa.float32())
+
+    date_lists = table.column('dates').combine_chunks()
+    first_dates = date_lists[0].values
+    dates = pc.strftime(first_dates, '%Y-%m-%d').to_pylist() if first_dates is not None else []
+
+    displacements = table.column('displacements').combine_chunks()
+    if pc.any(pc.not_equal(pc.list_value_length(displacements), len(dates))).as_py():
+        raise DateAxisError('selected points do not share one date axis')
+    if displacements.null_count:
+        missing = pa.scalar([None] * len(dates), displacements.type)
+        displacements = pc.if_else(displacements.is_valid(), displacements, missing)
+
+    values = pc.fill_null(pc.cast(pc.list_flatten(displacements), pa.float32()), float('nan'))
+    return dates, values
+
+def compact_selection(table, metrics):
+    """
+    Build the compact /api/select payload from a result table.
+
+    All EGMS points share one acquisition calendar, so the date axis is sent
+    once and displacements become a dense row-major float32 matrix
+    (points x dates), base64-encoded little-endian, that clients can wrap
+    in a Float32Array without parsing. Missing values are NaN.
+    Metrics and coordinates are parallel columns in point order.
+    """
+    num_points = table.num_rows
+    dates, values = date_axis_matrix(table)
+    matrix = values.buffers()[1].slice(values.offset * 4, len(values) * 4).to_pybytes() if len(values) else b''
+
+    payload = {
+        'format': 'compact',
+        'dates': dates,
+        'point_ids': table.column('point_id').to_pylist(),
+        'longitude': table.column('longitude').to_pylist(),
+        'latitude': table.column('latitude').to_pylist(),
+        'displacements': {
+            'shape': [num_points, len(dates)],
+            'dtype': 'float32',
+            'encoding': 'base64',
+            'data': base64.b64encode(matrix).decode('ascii'),
+        },
+        # missing metric values are reported as 0, as in the GeoJSON format
+        'metrics': {m: pc.fill_null(table.column(m), 0).to_pylist() for m in metrics},
+    }
+    return json.dumps(payload, separators=(',', ':')).encode()
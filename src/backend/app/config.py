@@ -2,4 +2,52 @@ import os
 
 class Config:
     GEOPARQUET_PATH = os.environ.get('GEOPARQUET_PATH', '/app/data/egms_optimized_be.geoparquet')
-
+    # Max number of concurrent DuckDB cursors per process
+    DUCKDB_POOL_SIZE = int(os.environ.get('DUCKDB_POOL_SIZE', 8))
+    # Byte budget of the in-process /api/data response cache (0 disables it)
+    TILE_CACHE_MAX_BYTES = int(os.environ.get('TILE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+    # Upper bound on tiles accepted by one /api/tiles request
+    MAX_BATCH_TILES = int(os.environ.get('MAX_BATCH_TILES', 256))
+    # Serve tile requests from a footer-derived row group index when the file is local
+    TILE_INDEX_ENABLED = os.environ.get('TILE_INDEX_ENABLED', 'true').lower() == 'true'
+    # Opt-in: import the GeoParquet once into this read-only DuckDB file (e.g. /app/data/egms_data.duckdb)
+    DUCKDB_DATABASE_PATH = os.environ.get('DUCKDB_DATABASE_PATH', '')
+    # Rows per Arrow record batch when streaming /api/data responses
+    ARROW_STREAM_CHUNK_SIZE = int(os.environ.get('ARROW_STREAM_CHUNK_SIZE', 65536))
+    # /api/data responses larger than this are not kept in the tile cache, and are streamed from then on
+    TILE_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('TILE_CACHE_MAX_ENTRY_BYTES', 64 * 1024 * 1024))
+    # Optional date-sliced companion file (one column per date) used by static-mode queries
+    GEOPARQUET_DATES_PATH = os.environ.get('GEOPARQUET_DATES_PATH', '')
+    # Cache-Control max-age (seconds) for ETag-tagged read responses
+    HTTP_CACHE_MAX_AGE = int(os.environ.get('HTTP_CACHE_MAX_AGE', 86400))
+    # Serve /api/select from a pid -> row position index when the file is local
+    PID_INDEX_ENABLED = os.environ.get('PID_INDEX_ENABLED', 'true').lower() == 'true'
+    # Up to this many point_ids are looked up with per-id pid index probes on a materialized
+    # database; larger sets are joined against an Arrow table of ids (probes stop paying off)
+    SELECT_PID_PROBE_MAX = int(os.environ.get('SELECT_PID_PROBE_MAX', 100))
+    # Optional aggregated overview product served by /api/overview
+    OVERVIEW_PATH = os.environ.get('OVERVIEW_PATH', '')
+    # Smallest on-screen overview cell size (pixels) when picking a level by zoom
+    OVERVIEW_MIN_CELL_PX = float(os.environ.get('OVERVIEW_MIN_CELL_PX', 4))
+    # Max seconds a request waits for an identical in-flight /api/data query before running its own
+    SINGLE_FLIGHT_TIMEOUT = float(os.environ.get('SINGLE_FLIGHT_TIMEOUT', 30))
+    # Warm the tile cache with the neighbours and next tier of each served tile
+    PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', 'true').lower() == 'true'
+    # Pending prefetch jobs kept; the oldest are dropped first
+    PREFETCH_QUEUE_SIZE = int(os.environ.get('PREFETCH_QUEUE_SIZE', 64))
+    # Optional: serve every *.geoparquet file in this directory as a dataset named after the file
+    DATASETS_DIR = os.environ.get('DATASETS_DIR', '')
+    # Optional JSON manifest of named datasets ({"name": {"path": ..., "dates_path": ..., ...}})
+    DATASETS_MANIFEST = os.environ.get('DATASETS_MANIFEST', '')
+    # Dataset used by requests without a `dataset` parameter
+    DEFAULT_DATASET = os.environ.get('DEFAULT_DATASET', 'default')
+    # Datasets kept open per process; the least recently used one is closed beyond this
+    DATASETS_MAX_OPEN = int(os.environ.get('DATASETS_MAX_OPEN', 4))
+    # Optional local directory caching byte ranges of http(s) GeoParquet sources across restarts
+    REMOTE_CACHE_DIR = os.environ.get('REMOTE_CACHE_DIR', '')
+    # Disk budget of the remote range cache
+    REMOTE_CACHE_MAX_BYTES = int(os.environ.get('REMOTE_CACHE_MAX_BYTES', 4 * 1024 * 1024 * 1024))
+    # Size of the blocks the remote range cache fetches and stores
+    REMOTE_CACHE_BLOCK_SIZE = int(os.environ.get('REMOTE_CACHE_BLOCK_SIZE', 1024 * 1024))
+    # Honour the profile=1 / profile=explain request flag (Server-Timing headers, query plans)
+    PROFILE_ENABLED = os.environ.get('PROFILE_ENABLED', 'false').lower() == 'true'
@@ -0,0 +1,65 @@
+import glob
+import json
+import os
+
+from .config import Config
+
+class UnknownDatasetError(KeyError):
+    """Raised for a `dataset` name that is not configured."""
+
+    def __str__(self):
+        return f"unknown dataset: {self.args[0]}"
+
+def _spec(path, dates_path='', overview_path='', database_path=''):
+    return {
+        'path': path,
+        'dates_path': dates_path or '',
+        'overview_path': overview_path or '',
+        'database_path': database_path or '',
+    }
+
+def _directory_specs(directory):
+    """
+    Every `*.geoparquet` file in `directory`, named after the file. The
+    pipeline's companion files (`<name>_by_date.parquet`,
+    `<name>_overview.parquet`) are picked up when they exist.
+    """
+    specs = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.geoparquet'))):
+        name = os.path.basename(path)[:-len('.geoparquet')]
+        dates_path = path.replace('.geoparquet', '_by_date.parquet')
+        overview_path = path.replace('.geoparquet', '_overview.parquet')
+        specs[name] = _spec(
+            path,
+            dates_path if os.path.isfile(dates_path) else '',
+            overview_path if os.path.isfile(overview_path) else '',
+        )
+    return specs
+
+def _manifest_specs(manifest_path):
+    """
+    Datasets listed in a JSON manifest:
+    {"<name>": {"path": ..., "dates_path": ..., "overview_path": ..., "database_path": ...}}
+    Only `path` is required; paths may be local files or https:// URLs.
+    """
+    with open(manifest_path) as f:
+        entries = json.load(f)
+    return {
+        name: _spec(entry['path'], entry.get('dates_path'), entry.get('overview_path'), entry.get('database_path'))
+        for name, entry in entries.items()
+    }
+
+def load_dataset_specs():
+    """
+    Return name -> spec for every configured dataset. `default` is always the
+    single-dataset configuration (GEOPARQUET_PATH and its companion settings);
+    DATASETS_DIR and then DATASETS_MANIFEST add (or override) named datasets.
+    """
+    specs = {'default': _spec(
+        Config.GEOPARQUET_PATH, Config.GEOPARQUET_DATES_PATH, Config.OVERVIEW_PATH, Config.DUCKDB_DATABASE_PATH,
+    )}
+    if Config.DATASETS_DIR:
+        specs.update(_directory_specs(Config.DATASETS_DIR))
+    if Config.DATASETS_MANIFEST:
+        specs.update(_manifest_specs(Config.DATASETS_MANIFEST))
+    return specs
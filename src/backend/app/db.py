@@ -1,19 +1,313 @@
+import atexit
+import fcntl
+import gc
+import os
+import queue
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
 import duckdb
+import pyarrow.dataset as ds
+from .cache import tile_cache
 from .config import Config
+from .datasets import UnknownDatasetError, load_dataset_specs
+from .http_cache import dataset_fingerprint
+from .metadata import DatasetMetadata
+from .pid_index import PidIndex
+from .range_cache import cached_http_filesystem, is_remote
+from .tile_index import TileIndex
+from .timing import timed
+
+# Column prefix of the date-sliced companion file (see generate_tiled_geoparquet.py)
+DATE_COLUMN_PREFIX = 'disp_'
 
 class Database:
-    def __init__(self, geoparquet_path=None):
-        self._init_db(geoparquet_path)
+    """
+    DuckDB connection manager of one dataset.
+
+    ``Database()`` returns the default dataset and ``Database(name)`` a named
+    one (see ``datasets.py``). The first call for a dataset opens one warm
+    in-memory connection, loads the extensions and creates the ``egms_data``
+    view; later calls return the same instance, so request handlers don't pay
+    for connection setup. At most ``Config.DATASETS_MAX_OPEN`` datasets stay
+    open: opening another one closes the least recently used, whose connection
+    and indexes are freed once its in-flight requests finish.
+
+    Queries should run on a pooled cursor (``with db.cursor() as cur``). Cursors
+    share the parent connection's catalog and parquet metadata cache, and the
+    pool is bounded by ``Config.DUCKDB_POOL_SIZE``.
+    """
+    _instances = OrderedDict()
+    _instance_lock = threading.Lock()
+    # name -> lock held while that dataset is being opened
+    _open_locks = {}
+    _specs = None
+
+    def __new__(cls, dataset=None):
+        name = dataset or Config.DEFAULT_DATASET
+        with cls._instance_lock:
+            instance = cls._lookup(name)
+            if instance is not None:
+                return instance
+            if cls._specs is None:
+                cls._specs = load_dataset_specs()
+            spec = cls._specs.get(name)
+            if spec is None:
+                raise UnknownDatasetError(name)
+            open_lock = cls._open_locks.setdefault(name, threading.Lock())
+
+        # Opening takes seconds (indexes, metadata scan), so it runs outside the
+        # class lock: requests for open datasets carry on, and concurrent first
+        # requests for this one wait for a single open
+        with open_lock:
+            with cls._instance_lock:
+                instance = cls._lookup(name)
+                if instance is not None:
+                    return instance
+            instance = super().__new__(cls)
+            with timed('db-connect'):
+                instance._init_db(name, spec)
+
+            with cls._instance_lock:
+                cls._instances[name] = instance
+                while len(cls._instances) > max(1, Config.DATASETS_MAX_OPEN):
+                    evicted, _ = cls._instances.popitem(last=False)
+                    print(f"Closing dataset {evicted}")
+                    tile_cache.evict_where(lambda key: key[0] == evicted)
+        return instance
+
+    @classmethod
+    def _lookup(cls, name):
+        """The open instance of `name`, marked most recently used; call with the class lock held."""
+        instance = cls._instances.get(name)
+        if instance is not None:
+            cls._instances.move_to_end(name)
+        return instance
+
+    @classmethod
+    def opened(cls, dataset=None):
+        """The open instance of `dataset`, or None; never opens it."""
+        with cls._instance_lock:
+            return cls._instances.get(dataset or Config.DEFAULT_DATASET)
+
+    @classmethod
+    def dataset_names(cls):
+        """Configured dataset names and whether each one is open."""
+        with cls._instance_lock:
+            if cls._specs is None:
+                cls._specs = load_dataset_specs()
+            return {name: name in cls._instances for name in cls._specs}
+
+    def _init_db(self, name, spec):
+        path = spec['path']
+        self.name = name
+        self.path = path
+        self.database_path = spec['database_path']
+        # pyarrow datasets registered on the connection and on every pooled cursor
+        self._arrow_sources = {}
+
+        if self.database_path:
+            # Opt-in: query a tile-ordered local copy shared read-only by all workers
+            _materialize(path, self.database_path)
+            self.conn = duckdb.connect(database=self.database_path, read_only=True)
+            _load_extensions(self.conn)
+            self.tile_index = None
+            self.pid_index = None
+        else:
+            self.conn = duckdb.connect(database=':memory:', read_only=False)
+            _load_extensions(self.conn)
+            # keep parquet footers/statistics in memory between queries
+            self.conn.execute("SET enable_object_cache = true")
+            source = self._parquet_source('egms_source', path)
+            self.conn.execute(f"CREATE OR REPLACE VIEW egms_data AS SELECT * FROM {source}")
+
+            # Tile -> row group index for direct pyarrow reads of local files. Remote
+            # files (even range-cached) stay on the SQL path: building the indexes
+            # would pull most of the object before the first request is served
+            self.tile_index = TileIndex.build(path) if Config.TILE_INDEX_ENABLED else None
+            # Sorted pid -> row position index for selections (local files)
+            self.pid_index = PidIndex.build(path) if Config.PID_INDEX_ENABLED else None
+
+        # Arrow type of pid, used to type id tables joined against egms_data
+        self.pid_type = self.conn.execute("SELECT pid FROM egms_data LIMIT 0").fetch_arrow_table().schema.field('pid').type
+        # Schema, footer statistics, tiles per tier and date axis, for /api/schema and request checks;
+        # a remote source is not scanned for its tiles (a materialized copy is local)
+        self.metadata = DatasetMetadata.load(
+            self.conn, path, self._filesystem(path), scan=not is_remote(path) or bool(self.database_path),
+        )
+
+        self._init_date_sidecar(spec['dates_path'])
+        self._init_overview(spec['overview_path'])
 
-    def _init_db(self, geoparquet_path):
-        self.conn = duckdb.connect(database=':memory:', read_only=False)
-        self.conn.execute("INSTALL spatial; LOAD spatial;")
-        self.conn.execute("INSTALL httpfs; LOAD httpfs;")
-        path = geoparquet_path if geoparquet_path else Config.GEOPARQUET_PATH
-        self.conn.execute(f"CREATE OR REPLACE VIEW egms_data AS SELECT * FROM read_parquet('{path}')")
+        # Identifies this version of the data for HTTP ETags
+        self.fingerprint = dataset_fingerprint(path, spec['dates_path'], spec['overview_path'])
+
+        self._pool_size = max(1, Config.DUCKDB_POOL_SIZE)
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self._pool_size)
+
+    @staticmethod
+    def _filesystem(path):
+        """The disk range cache filesystem for a remote `path`, or None (local file or cache disabled)."""
+        return cached_http_filesystem() if is_remote(path) else None
+
+    def _parquet_source(self, name, path):
+        """
+        SQL source expression for a Parquet file. Remote files are read through
+        the disk range cache when it is enabled, as a pyarrow dataset registered
+        under `name`; everything else goes through read_parquet().
+        """
+        filesystem = self._filesystem(path)
+        if filesystem is None:
+            return f"read_parquet('{path}')"
+        self._arrow_sources[name] = ds.dataset(path, format='parquet', filesystem=filesystem)
+        self.conn.register(name, self._arrow_sources[name])
+        return name
+
+    def _init_date_sidecar(self, dates_path):
+        """
+        Register the optional time-major companion file written by the pipeline
+        (one `disp_NNNN` column per date). Referenced through read_parquet()
+        rather than a view so it also works on a read-only materialized database.
+        """
+        self.date_source = None
+        self.date_columns = set()
+        self.date_tile_index = None
+        if not dates_path:
+            return
+
+        self.date_source = self._parquet_source('egms_dates_source', dates_path)
+        columns = self.conn.execute(f"SELECT * FROM {self.date_source} LIMIT 0").description
+        self.date_columns = {col[0] for col in columns if col[0].startswith(DATE_COLUMN_PREFIX)}
+        if Config.TILE_INDEX_ENABLED and not self.database_path:
+            self.date_tile_index = TileIndex.build(dates_path)
+
+    def _init_overview(self, overview_path):
+        """
+        Register the optional aggregated overview product written by the pipeline
+        and load its (level, cell_size) list, coarsest first.
+        """
+        self.overview_source = None
+        self.overview_levels = []
+        if not overview_path:
+            return
+
+        self.overview_source = self._parquet_source('egms_overview_source', overview_path)
+        self.overview_levels = self.conn.execute(
+            f"SELECT DISTINCT level, cell_size FROM {self.overview_source} ORDER BY level"
+        ).fetchall()
 
     def get_conn(self):
         return self.conn
 
-db = Database()
+    @contextmanager
+    def cursor(self):
+        """
+        Borrow a cursor from the pool, blocking while all cursors are in use.
+        Cursors are created lazily and returned to the pool after use.
+        """
+        with timed('db-connect'):
+            self._slots.acquire()
+        try:
+            try:
+                cur = self._idle.get_nowait()
+            except queue.Empty:
+                with timed('db-connect'):
+                    cur = self.conn.cursor()
+                    for name, source in self._arrow_sources.items():
+                        cur.register(name, source)
+            try:
+                yield cur
+            except Exception:
+                # a failed query can leave the cursor mid-result; don't reuse it
+                cur.close()
+                raise
+            else:
+                self._idle.put(cur)
+        finally:
+            self._slots.release()
+
+    @classmethod
+    def close_all(cls):
+        """
+        Close every open dataset. Run at exit: once a pyarrow dataset source
+        (range-cached remote file) has been scanned from a worker thread, the
+        process aborts if it is still alive when the interpreter tears down.
+        """
+        with cls._instance_lock:
+            instances = list(cls._instances.values())
+            cls._instances.clear()
+        for instance in instances:
+            while not instance._idle.empty():
+                instance._idle.get_nowait().close()
+            instance.conn.close()
+            instance._arrow_sources.clear()
+        # the sources can sit in reference cycles; free them now, not at teardown
+        gc.collect()
+
+atexit.register(Database.close_all)
+
+def _load_extensions(conn):
+    conn.execute("INSTALL spatial; LOAD spatial;")
+    conn.execute("INSTALL httpfs; LOAD httpfs;")
+
+def _materialized_source(db_path):
+    """
+    Return (source_path, source_fingerprint) of the GeoParquet a materialized
+    database was built from, or None (no database, or built by an older version).
+    """
+    if not os.path.exists(db_path):
+        return None
+    try:
+        with duckdb.connect(database=db_path, read_only=True) as conn:
+            return conn.execute("SELECT source_path, source_fingerprint FROM egms_meta").fetchone()
+    except duckdb.Error:
+        return None
+
+def _materialize(source_path, db_path):
+    """
+    Import `source_path` into a persistent DuckDB file at `db_path`, unless it
+    already holds that version of the source (same path and fingerprint, so a
+    file replaced in place is imported again). Rows are ordered by tile so the
+    zone maps of the row groups prune tile and bbox filters; an ART index on
+    pid serves `pid = ?` lookups. DuckDB doesn't use ART indexes for IN-lists
+    or multi-column range filters, so there is no tile index.
+
+    Workers serialize on a lock file; the first one builds into a temporary
+    file and renames it into place, the others find it ready and open it.
+    """
+    with open(db_path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            source_fingerprint = dataset_fingerprint(source_path)
+            built_from = _materialized_source(db_path)
+            if built_from is not None and built_from[0] == source_path:
+                if source_fingerprint is None:
+                    print(f"Could not fingerprint {source_path}; reusing {db_path}")
+                    return
+                if built_from[1] == source_fingerprint:
+                    return
+
+            print(f"Materializing {source_path} into {db_path} ...")
+            tmp_path = db_path + '.tmp'
+            for stale in (tmp_path, tmp_path + '.wal'):
+                if os.path.exists(stale):
+                    os.remove(stale)
 
+            with duckdb.connect(database=tmp_path) as conn:
+                _load_extensions(conn)
+                conn.execute(f"""
+                    CREATE TABLE egms_data AS
+                    SELECT * FROM read_parquet('{source_path}')
+                    ORDER BY tier_id, tile_x, tile_y
+                """)
+                conn.execute("CREATE INDEX egms_data_pid_idx ON egms_data (pid)")
+                conn.execute(
+                    "CREATE TABLE egms_meta AS SELECT ?::VARCHAR AS source_path, ?::VARCHAR AS source_fingerprint",
+                    [source_path, source_fingerprint],
+                )
+                conn.execute("CHECKPOINT")
+            os.replace(tmp_path, db_path)
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
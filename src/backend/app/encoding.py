@@ -0,0 +1,43 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# Finest step of the q16 encoding, in the displacement unit (mm)
+Q16_RESOLUTION = 0.01
+Q16_MAX = 32767
+
+def quantize_displacements(table, column='displacements'):
+    """
+    Replace the float `column` list with an int16 list (q16 encoding).
+
+    Values are stored as ``round((value - offset) / scale)`` with a per-table
+    offset (the middle of the value range) and scale (Q16_RESOLUTION, or
+    coarser when the range does not fit 16 bits). Clients decode with
+    ``value = q * scale + offset`` using the schema metadata keys
+    ``<column>_encoding``, ``<column>_scale`` and ``<column>_offset``.
+    NaN and infinite values have no int16 code and become nulls.
+    """
+    index = table.schema.get_field_index(column)
+    lists = table.column(index).combine_chunks()
+    values = pc.cast(lists.values, pa.float64())
+    # min_max skips NaN but not +-inf, and neither can be cast to int16
+    values = pc.if_else(pc.is_finite(values), values, pa.scalar(None, pa.float64()))
+
+    bounds = pc.min_max(values).as_py()
+    low = bounds['min'] if bounds['min'] is not None else 0.0
+    high = bounds['max'] if bounds['max'] is not None else 0.0
+    offset = (low + high) / 2
+    scale = max(Q16_RESOLUTION, (high - low) / (2 * Q16_MAX))
+
+    quantized = pc.round(pc.divide(pc.subtract(values, offset), scale))
+    quantized = pc.cast(quantized, pa.int16())
+    list_class = pa.LargeListArray if pa.types.is_large_list(lists.type) else pa.ListArray
+    encoded = list_class.from_arrays(lists.offsets, quantized, mask=lists.is_null())
+
+    table = table.set_column(index, pa.field(column, encoded.type), encoded)
+    metadata = dict(table.schema.metadata or {})
+    metadata.update({
+        f'{column}_encoding'.encode(): b'q16',
+        f'{column}_scale'.encode(): repr(scale).encode(),
+        f'{column}_offset'.encode(): repr(offset).encode(),
+    })
+    return table.replace_schema_metadata(metadata)
@@ -0,0 +1,78 @@
+import hashlib
+import os
+import struct
+import urllib.request
+
+from flask import Response, request
+
+from .config import Config
+from .timing import current_profile
+
+def _file_fingerprint(path):
+    """Size, mtime and a hash of the Parquet footer of a local file."""
+    stat = os.stat(path)
+    digest = hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+    with open(path, 'rb') as f:
+        if stat.st_size >= 12:
+            f.seek(-8, os.SEEK_END)
+            footer_len, magic = struct.unpack('<I4s', f.read(8))
+            if magic == b'PAR1' and footer_len + 8 <= stat.st_size:
+                f.seek(-(footer_len + 8), os.SEEK_END)
+                digest.update(f.read(footer_len))
+    return digest.hexdigest()
+
+def _remote_fingerprint(url):
+    """The object's ETag (or Last-Modified + size) from a HEAD request."""
+    head = urllib.request.Request(url, method='HEAD')
+    with urllib.request.urlopen(head, timeout=10) as resp:
+        etag = resp.headers.get('ETag')
+        if etag:
+            return etag.strip('"')
+        last_modified = resp.headers.get('Last-Modified')
+        length = resp.headers.get('Content-Length')
+        if last_modified and length:
+            return hashlib.sha1(f"{last_modified}:{length}".encode()).hexdigest()
+    return None
+
+def dataset_fingerprint(*paths):
+    """
+    Identify the current version of the data files. Returns None if any file
+    can't be fingerprinted, which disables ETags rather than risk stale 304s.
+    """
+    parts = []
+    for path in paths:
+        if not path:
+            continue
+        try:
+            if path.startswith(('http://', 'https://')):
+                part = _remote_fingerprint(path)
+            else:
+                part = _file_fingerprint(path)
+        except (OSError, ValueError) as e:
+            print(f"Could not fingerprint {path}: {e}")
+            return None
+        if part is None:
+            return None
+        parts.append(f"{path}={part}")
+    return hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+def make_etag(fingerprint, *key_parts):
+    """Strong ETag for a response derived from the dataset and normalized request."""
+    if fingerprint is None:
+        return None
+    return hashlib.sha1(repr((fingerprint,) + key_parts).encode()).hexdigest()
+
+def not_modified(etag):
+    """
+    A 304 response if the request's If-None-Match already matches `etag`.
+    Profiled requests always get the full response.
+    """
+    if etag is None or current_profile() is not None or not request.if_none_match.contains(etag):
+        return None
+    return with_cache_headers(Response(status=304), etag)
+
+def with_cache_headers(response, etag):
+    if etag is not None:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f"public, max-age={Config.HTTP_CACHE_MAX_AGE}"
+    return response
@@ -0,0 +1,206 @@
+import datetime
+import math
+import os
+
+import pyarrow.parquet as pq
+
+# Columns locating a point in the tile grid of the tiled GeoParquet
+TILE_COLUMNS = ('tier_id', 'tile_x', 'tile_y')
+
+def _json_value(value):
+    """A footer statistic as a JSON-friendly value, or None if it isn't a plain number or date."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, str):
+        # parquet_metadata() reports statistics as text
+        for parse in (int, float):
+            try:
+                return _json_value(parse(value))
+            except ValueError:
+                pass
+    return None
+
+def _merge(stats, name, low, high, nulls):
+    entry = stats.setdefault(name, {'min': None, 'max': None, 'null_count': 0})
+    low, high = _json_value(low), _json_value(high)
+    if low is not None and (entry['min'] is None or low < entry['min']):
+        entry['min'] = low
+    if high is not None and (entry['max'] is None or high > entry['max']):
+        entry['max'] = high
+    entry['null_count'] += nulls or 0
+
+def _tile_range(ranges, name, low, high):
+    """Record the min/max of a tile column in one row group's `ranges`."""
+    if name in TILE_COLUMNS:
+        ranges[name] = (_json_value(low), _json_value(high))
+
+def _footer_stats_pyarrow(parquet_file):
+    """
+    (num_rows, num_row_groups, {column: min/max/null_count}, row_groups) from a
+    parsed footer, where row_groups lists (num_rows, {tile column: (min, max)}).
+    """
+    metadata = parquet_file.metadata
+    stats, row_groups = {}, []
+    for rg in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg)
+        ranges = {}
+        for i in range(row_group.num_columns):
+            column = row_group.column(i)
+            # nested leaves (list elements) are summarized under their top-level name
+            name = column.path_in_schema.split('.')[0]
+            statistics = column.statistics
+            if statistics is None:
+                continue
+            low, high = (statistics.min, statistics.max) if statistics.has_min_max else (None, None)
+            _merge(stats, name, low, high, statistics.null_count if statistics.has_null_count else 0)
+            _tile_range(ranges, name, low, high)
+        row_groups.append((row_group.num_rows, ranges))
+    return metadata.num_rows, metadata.num_row_groups, stats, row_groups
+
+def _footer_stats_duckdb(conn, path):
+    """Same as _footer_stats_pyarrow, for files only DuckDB can reach (https:// without the range cache)."""
+    rows = conn.execute(f"""
+        SELECT row_group_id, row_group_num_rows, path_in_schema,
+               stats_min_value, stats_max_value, stats_null_count
+        FROM parquet_metadata('{path}')
+    """).fetchall()
+    stats, row_groups = {}, {}
+    for rg, rg_rows, column, low, high, nulls in rows:
+        name = column.split('.')[0]
+        _merge(stats, name, low, high, nulls)
+        _tile_range(row_groups.setdefault(rg, (rg_rows, {}))[1], name, low, high)
+    row_groups = [row_groups[rg] for rg in sorted(row_groups)]
+    return sum(rg_rows for rg_rows, _ in row_groups), len(row_groups), stats, row_groups
+
+def _footer_tier_extents(row_groups):
+    """
+    Tier extents estimated from the tile column min/max of each row group,
+    for sources too costly to scan. Tile counts are unknown (None), and row
+    counts are only known for tiers whose row groups hold no other tier.
+    Returns {} if a row group lacks the statistics.
+    """
+    extents = {}
+    for num_rows, ranges in row_groups:
+        if any(not isinstance(value, int) for name in TILE_COLUMNS for value in ranges.get(name, (None, None))):
+            return {}
+        (tier_low, tier_high), (x_low, x_high), (y_low, y_high) = (ranges[name] for name in TILE_COLUMNS)
+        for tier in range(tier_low, tier_high + 1):
+            entry = extents.setdefault(tier, {'rows': 0, 'tiles': None, 'tile_x': [x_low, x_high], 'tile_y': [y_low, y_high]})
+            single_tier = tier_low == tier_high and entry['rows'] is not None
+            entry['rows'] = entry['rows'] + num_rows if single_tier else None
+            entry['tile_x'] = [min(entry['tile_x'][0], x_low), max(entry['tile_x'][1], x_high)]
+            entry['tile_y'] = [min(entry['tile_y'][0], y_low), max(entry['tile_y'][1], y_high)]
+    return extents
+
+def _first_dates_pyarrow(parquet_file):
+    """The `dates` list of the first row, read from the first row group only."""
+    if parquet_file.metadata.num_row_groups == 0:
+        return None
+    column = parquet_file.read_row_group(0, columns=['dates']).column('dates')
+    return column[0].as_py() if len(column) else None
+
+class DatasetMetadata:
+    """
+    Facts about a dataset read once when it is opened: the schema of
+    ``egms_data``, row and row group counts, per-column min/max/null counts
+    from the Parquet footer, the tiles present in each tier and the date axis.
+
+    Requests can be validated against it (unknown columns, date indexes out
+    of range, tiles with no points) without running a query. For sources
+    that are not scanned, `tiles` is None and `extents` holds the tier
+    extents estimated from the footer.
+    """
+
+    def __init__(self, columns, num_rows, num_row_groups, stats, tiles, dates, extents=None):
+        # [(name, duckdb_type)]
+        self.columns = columns
+        self.column_names = {name for name, _ in columns}
+        self.num_rows = num_rows
+        self.num_row_groups = num_row_groups
+        self.stats = stats
+        # {(tier, tile_x, tile_y): row_count}, or None when unknown
+        self.tiles = tiles
+        self.dates = dates
+        self._extents = extents or {}
+
+    @classmethod
+    def load(cls, conn, path, filesystem=None, scan=True):
+        """
+        Read the metadata of `path` through `conn`, whose `egms_data` view
+        must already exist. The footer and the first row group are read with
+        pyarrow when the file is readable that way (local, or remote through
+        `filesystem`). Without `scan` (remote sources), `egms_data` is not
+        scanned for the tiles present: tier extents come from the footer
+        statistics, as reported by DuckDB, and every tile may exist.
+        """
+        columns = [(row[0], row[1]) for row in conn.execute("DESCRIBE egms_data").fetchall()]
+
+        parquet_file = None
+        if filesystem is not None or os.path.isfile(path):
+            parquet_file = pq.ParquetFile(filesystem.open_input_file(path) if filesystem else path)
+        if parquet_file is not None and scan:
+            num_rows, num_row_groups, stats, row_groups = _footer_stats_pyarrow(parquet_file)
+        else:
+            # pyarrow drops the min/max of unsigned columns (the UTINYINT tier_id) when the
+            # writer recorded no column order, as DuckDB does; the tier extents need them
+            num_rows, num_row_groups, stats, row_groups = _footer_stats_duckdb(conn, path)
+
+        tiles, extents = {}, None
+        names = {name for name, _ in columns}
+        if set(TILE_COLUMNS) <= names:
+            if scan:
+                rows = conn.execute(
+                    "SELECT tier_id, tile_x, tile_y, COUNT(*) FROM egms_data GROUP BY tier_id, tile_x, tile_y"
+                ).fetchall()
+                tiles = {(tier, x, y): count for tier, x, y, count in rows}
+            else:
+                tiles, extents = None, _footer_tier_extents(row_groups)
+
+        dates = []
+        if 'dates' in names:
+            if parquet_file is not None:
+                first = _first_dates_pyarrow(parquet_file)
+            else:
+                row = conn.execute("SELECT dates FROM egms_data LIMIT 1").fetchone()
+                first = row[0] if row else None
+            dates = [d.strftime('%Y-%m-%d') for d in first] if first else []
+
+        return cls(columns, num_rows, num_row_groups, stats, tiles, dates, extents)
+
+    def missing_columns(self, columns):
+        return [col for col in columns if col not in self.column_names]
+
+    def has_tile(self, tier, tile_x, tile_y):
+        # without tile columns nothing is known, so every tile may exist
+        return not self.tiles or (tier, tile_x, tile_y) in self.tiles
+
+    def tier_extents(self):
+        """{tier: {rows, tiles, tile_x: [min, max], tile_y: [min, max]}}; rows and tiles may be None if not scanned."""
+        if self.tiles is None:
+            return self._extents
+        extents = {}
+        for (tier, x, y), count in self.tiles.items():
+            entry = extents.setdefault(tier, {'rows': 0, 'tiles': 0, 'tile_x': [x, x], 'tile_y': [y, y]})
+            entry['rows'] += count
+            entry['tiles'] += 1
+            entry['tile_x'] = [min(entry['tile_x'][0], x), max(entry['tile_x'][1], x)]
+            entry['tile_y'] = [min(entry['tile_y'][0], y), max(entry['tile_y'][1], y)]
+        return extents
+
+    def to_json(self):
+        return {
+            'num_rows': self.num_rows,
+            'num_row_groups': self.num_row_groups,
+            'columns': [
+                dict({'name': name, 'type': column_type}, **self.stats.get(name, {'min': None, 'max': None, 'null_count': None}))
+                for name, column_type in self.columns
+            ],
+            'tiers': {str(tier): extent for tier, extent in sorted(self.tier_extents().items())},
+            'dates': self.dates,
+        }
@@ -0,0 +1,109 @@
+import threading
+from bisect import bisect_left
+
+# Label names shared by the per-request metrics; use '' where one doesn't apply
+REQUEST_LABELS = ('route', 'tier', 'mode', 'global')
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labels)
+
+    def _label_text(self, key, extra=None):
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labels, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            series = sorted(self._series.items())
+        for key, value in series:
+            lines.extend(self._render_series(key, value))
+        return lines
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _render_series(self, key, value):
+        return [f'{self.name}{self._label_text(key)} {_number(value)}']
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels, buckets):
+        super().__init__(name, documentation, labels)
+        self.buckets = sorted(buckets)
+
+    def observe(self, labels, value):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._series.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts = list(counts)
+            # counts per bucket here; made cumulative when rendered
+            counts[bisect_left(self.buckets, value)] += 1
+            self._series[key] = (counts, total + value)
+
+    def _render_series(self, key, value):
+        counts, total = value
+        lines, cumulative = [], 0
+        for bound, count in zip(self.buckets + [float('inf')], counts):
+            cumulative += count
+            le = 'le="+Inf"' if bound == float('inf') else f'le="{_number(bound)}"'
+            lines.append(f'{self.name}_bucket{self._label_text(key, le)} {cumulative}')
+        lines.append(f'{self.name}_sum{self._label_text(key)} {_number(total)}')
+        lines.append(f'{self.name}_count{self._label_text(key)} {cumulative}')
+        return lines
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+_SECONDS = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+_BYTES = [1024 * 4 ** k for k in range(10)]  # 1 KB .. 256 MB
+_ROWS = [10 ** k for k in range(8)]  # 1 .. 10M
+
+REQUESTS = Counter(
+    'egms_requests_total', 'Requests by route and cache outcome.', ('route', 'cache'))
+QUERY_SECONDS = Histogram(
+    'egms_query_seconds', 'Time reading data (DuckDB query and fetch, or indexed read).', REQUEST_LABELS, _SECONDS)
+SERIALIZE_SECONDS = Histogram(
+    'egms_serialize_seconds', 'Time encoding the response (Arrow IPC, JSON).', REQUEST_LABELS, _SECONDS)
+RESPONSE_BYTES = Histogram(
+    'egms_response_bytes', 'Response body size.', REQUEST_LABELS, _BYTES)
+RESPONSE_ROWS = Histogram(
+    'egms_response_rows', 'Rows (points) in the response.', REQUEST_LABELS, _ROWS)
+
+_METRICS = [REQUESTS, QUERY_SECONDS, SERIALIZE_SECONDS, RESPONSE_BYTES, RESPONSE_ROWS]
+
+def render_prometheus():
+    """All metrics of this process in the Prometheus text format (version 0.0.4)."""
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def observe_request(labels, cache, query_seconds=None, serialize_seconds=None, response_bytes=None, rows=None):
+    """Record one request; measurements that don't apply (e.g. query time of a cache hit) are left out."""
+    REQUESTS.inc({'route': labels['route'], 'cache': cache})
+    for metric, value in ((QUERY_SECONDS, query_seconds), (SERIALIZE_SECONDS, serialize_seconds),
+                          (RESPONSE_BYTES, response_bytes), (RESPONSE_ROWS, rows)):
+        if value is not None:
+            metric.observe(labels, value)
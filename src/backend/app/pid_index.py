@@ -0,0 +1,102 @@
+import os
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+def _sort_keys(pids, width=None):
+    """
+    NumPy keys of a pid array that sort and compare like the pids: the
+    values themselves for numeric pids, and NUL-padded fixed-width bytes
+    (`width` bytes, default the longest pid) for string pids, so no Python
+    object is kept per point. Returns (keys, width).
+    """
+    if not (pa.types.is_string(pids.type) or pa.types.is_large_string(pids.type)):
+        return pids.to_numpy(zero_copy_only=False), None
+    if width is None:
+        width = max(pc.max(pc.binary_length(pids)).as_py() or 0, 1)
+    padded = pc.utf8_rpad(pids, width, padding='\x00')
+    if len(padded) and pc.all(pc.equal(pc.binary_length(padded), width)).as_py():
+        # one contiguous buffer of equal-length values, viewed as fixed-width bytes
+        return np.frombuffer(padded.buffers()[2], dtype=f'S{width}', count=len(padded)), width
+    # non-ASCII pids pad to unequal byte lengths; rare, so built value by value
+    return np.array([value.encode() for value in pids.to_pylist()], dtype=f'S{width}'), width
+
+class PidIndex:
+    """
+    Sorted pid -> row position index of a local GeoParquet file.
+
+    Built once with a scan of the pid column. A selection then reads only the
+    row groups holding the requested points and takes the matching rows,
+    instead of scanning the whole file for an IN-list. String pids are kept
+    as fixed-width byte keys rather than Python strings.
+    """
+
+    def __init__(self, path, metadata, keys, width, positions, row_group_starts):
+        self.path = path
+        self.metadata = metadata
+        self.schema = metadata.schema.to_arrow_schema()
+        self.pid_type = self.schema.field('pid').type
+        self._keys = keys
+        self._width = width
+        # file-wide row number of each sorted key, and the first row of every row group
+        self._positions = positions
+        self._row_group_starts = row_group_starts
+
+    @classmethod
+    def build(cls, path):
+        """Scan the pid column of `path` and return a PidIndex, or None for remote files."""
+        if not os.path.isfile(path):
+            return None
+
+        pf = pq.ParquetFile(path)
+        if 'pid' not in pf.schema_arrow.names:
+            return None
+
+        chunks = [pf.read_row_group(rg, columns=['pid']).column('pid') for rg in range(pf.metadata.num_row_groups)]
+        pids = pa.chunked_array(chunks, pf.schema_arrow.field('pid').type).combine_chunks()
+        row_group_starts = np.cumsum([0] + [len(chunk) for chunk in chunks[:-1]]).astype(np.int64)
+        del chunks
+
+        keys, width = _sort_keys(pids)
+        order = np.argsort(keys, kind='stable')
+        position_type = np.int32 if len(keys) < 2 ** 31 else np.int64
+        index = cls(path, pf.metadata, keys[order], width, order.astype(position_type), row_group_starts)
+        # hand the memory of the scanned pid column back instead of keeping it pooled
+        del pids, keys
+        pa.default_memory_pool().release_unused()
+        return index
+
+    def has_columns(self, columns):
+        return all(col in self.schema.names for col in columns)
+
+    def locate(self, point_ids):
+        """Return (row_groups, rows) arrays for the requested ids found in the file."""
+        ids = pc.unique(pa.array(point_ids).cast(self.pid_type).drop_null())
+        if self._width is not None:
+            # longer ids can't match, and would be truncated into false matches
+            ids = ids.filter(pc.less_equal(pc.binary_length(ids), self._width))
+        ids, _ = _sort_keys(ids, self._width)
+        positions = np.searchsorted(self._keys, ids)
+        in_range = positions < len(self._keys)
+        positions, ids = positions[in_range], ids[in_range]
+        found = self._positions[positions[self._keys[positions] == ids]]
+        row_groups = np.searchsorted(self._row_group_starts, found, side='right') - 1
+        return row_groups, found - self._row_group_starts[row_groups]
+
+    def read(self, point_ids, columns):
+        """Read `columns` for the requested ids, in file order."""
+        row_groups, rows = self.locate(point_ids)
+        if len(rows) == 0:
+            return self.schema.empty_table().select(columns)
+
+        order = np.lexsort((rows, row_groups))
+        row_groups, rows = row_groups[order], rows[order]
+        # reuse the parsed footer instead of reading it again
+        pf = pq.ParquetFile(self.path, metadata=self.metadata)
+        parts = []
+        for rg in np.unique(row_groups):
+            group_rows = rows[row_groups == rg]
+            parts.append(pf.read_row_group(int(rg), columns=columns).take(pa.array(group_rows)))
+        return pa.concat_tables(parts)
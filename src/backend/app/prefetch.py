@@ -0,0 +1,100 @@
+import atexit
+import threading
+import time
+import traceback
+from collections import deque
+
+class ActiveRequests:
+    """Thread-safe count of foreground requests in progress."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+
+    def enter(self):
+        with self._lock:
+            self._count += 1
+
+    def leave(self):
+        with self._lock:
+            self._count -= 1
+
+    def __len__(self):
+        with self._lock:
+            return self._count
+
+class Prefetcher:
+    """
+    Warm the tile cache with tiles a client is likely to request next.
+
+    Jobs wait in a bounded queue served newest-first by one daemon thread;
+    when the queue is full the oldest job is dropped, so a fast pan only
+    keeps the tiles around its latest position. A job waits while `is_busy`
+    reports foreground load (e.g. requests in progress), and jobs for which
+    `skip` is true (e.g. already cached) are dropped. Dropping or skipping a
+    job has no other effect, so nothing needs to be cancelled explicitly.
+    """
+
+    # Seconds to wait before re-checking foreground load
+    BACKOFF = 0.05
+
+    def __init__(self, fetch, skip, is_busy, max_queued):
+        self._fetch = fetch
+        self._skip = skip
+        self._is_busy = is_busy
+        self._jobs = deque(maxlen=max_queued)
+        self._ready = threading.Condition()
+        self._thread = None
+        self._stopped = False
+        self.completed = 0
+        self.dropped = 0
+
+    def submit(self, jobs):
+        """Queue `jobs` (arguments for `fetch`); the last one runs first."""
+        with self._ready:
+            for job in jobs:
+                if len(self._jobs) == self._jobs.maxlen:
+                    self.dropped += 1
+                self._jobs.append(job)
+            if self._thread is None and not self._stopped:
+                # started lazily so no thread exists before gunicorn forks
+                self._thread = threading.Thread(target=self._run, name='prefetch', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+            self._ready.notify()
+
+    def close(self, timeout=5):
+        """Drop pending jobs and wait for the running one, so exit never interrupts a query."""
+        with self._ready:
+            self._stopped = True
+            self._jobs.clear()
+            self._ready.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._ready:
+            return {'queued': len(self._jobs), 'completed': self.completed, 'dropped': self.dropped}
+
+    def _run(self):
+        while True:
+            with self._ready:
+                while not self._jobs and not self._stopped:
+                    self._ready.wait()
+                if self._stopped:
+                    return
+                job = self._jobs.pop()
+
+            if self._skip(job):
+                continue
+            while self._is_busy(job) and not self._stopped:
+                time.sleep(self.BACKOFF)
+            if self._stopped:
+                return
+            try:
+                self._fetch(job)
+            except Exception:
+                traceback.print_exc()
+                continue
+            with self._ready:
+                self.completed += 1
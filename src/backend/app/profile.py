@@ -0,0 +1,95 @@
+import math
+import warnings
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+class LocalProjection:
+    """
+    Equirectangular projection to metres around a reference point.
+
+    Accurate to well under 1% over the few-kilometre extent of a line profile,
+    and cheap enough to apply to every candidate point with NumPy.
+    """
+
+    def __init__(self, lon0, lat0):
+        self.lon0 = lon0
+        self.lat0 = lat0
+        self._kx = math.radians(1) * EARTH_RADIUS_M * math.cos(math.radians(lat0))
+        self._ky = math.radians(1) * EARTH_RADIUS_M
+
+    def forward(self, lon, lat):
+        return (np.asarray(lon, dtype=np.float64) - self.lon0) * self._kx, \
+               (np.asarray(lat, dtype=np.float64) - self.lat0) * self._ky
+
+    def buffer_degrees(self, metres):
+        """(dlon, dlat) covering `metres` around the reference point."""
+        return metres / self._kx, metres / self._ky
+
+# Upper bound on points x segments evaluated at once, to cap temporary memory
+_MAX_PAIRS_PER_CHUNK = 4_000_000
+
+def project_onto_line(x, y, line_x, line_y):
+    """
+    Project points onto a polyline (all in projected metres).
+
+    Returns (distance_along, offset) per point: the distance from the start
+    of the line to the closest point on it, and the signed perpendicular
+    distance to that closest point (positive to the left of the line).
+    """
+    chunk = max(1, _MAX_PAIRS_PER_CHUNK // max(1, len(line_x) - 1))
+    if len(x) <= chunk:
+        return _project_chunk(x, y, line_x, line_y)
+    parts = [_project_chunk(x[i:i + chunk], y[i:i + chunk], line_x, line_y) for i in range(0, len(x), chunk)]
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+def _project_chunk(x, y, line_x, line_y):
+    start_x, start_y = line_x[:-1], line_y[:-1]
+    seg_x, seg_y = np.diff(line_x), np.diff(line_y)
+    seg_len_sq = seg_x ** 2 + seg_y ** 2
+    seg_len = np.sqrt(seg_len_sq)
+    cum_len = np.concatenate([[0.0], np.cumsum(seg_len)[:-1]])
+
+    # points x segments
+    px = x[:, None] - start_x[None, :]
+    py = y[:, None] - start_y[None, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.where(seg_len_sq > 0, (px * seg_x + py * seg_y) / seg_len_sq, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    dx = px - t * seg_x
+    dy = py - t * seg_y
+    dist_sq = dx ** 2 + dy ** 2
+
+    nearest = np.argmin(dist_sq, axis=1)
+    rows = np.arange(len(x))
+    distance_along = cum_len[nearest] + t[rows, nearest] * seg_len[nearest]
+    # sign from the cross product of segment direction and point vector
+    cross = seg_x[nearest] * py[rows, nearest] - seg_y[nearest] * px[rows, nearest]
+    offset = np.sqrt(dist_sq[rows, nearest]) * np.where(cross < 0, -1.0, 1.0)
+    return distance_along, offset
+
+def bin_profile(distance, values, bin_size, length):
+    """
+    Average each metric over consecutive `bin_size` metre bins along the line.
+    `values` maps metric name -> array aligned with `distance`.
+    """
+    num_bins = max(1, int(math.ceil(length / bin_size)))
+    index = np.clip((distance // bin_size).astype(np.int64), 0, num_bins - 1)
+    counts = np.bincount(index, minlength=num_bins)
+
+    binned = {
+        'distance': ((np.arange(num_bins) + 0.5) * bin_size).tolist(),
+        'count': counts.tolist(),
+        'metrics': {},
+    }
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for name, column in values.items():
+            column = np.asarray(column, dtype=np.float64)
+            valid = ~np.isnan(column)
+            sums = np.bincount(index[valid], weights=column[valid], minlength=num_bins)
+            valid_counts = np.bincount(index[valid], minlength=num_bins)
+            means = sums / valid_counts
+            binned['metrics'][name] = [None if math.isnan(v) else v for v in means.tolist()]
+    return binned
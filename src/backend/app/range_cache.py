@@ -0,0 +1,271 @@
+import hashlib
+import io
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.fs as pafs
+
+from .config import Config
+
+def is_remote(path):
+    return path.startswith(('http://', 'https://'))
+
+def _runs(indices):
+    """Split sorted block numbers into runs of consecutive ones."""
+    runs = []
+    for i in indices:
+        if runs and runs[-1][-1] == i - 1:
+            runs[-1].append(i)
+        else:
+            runs.append([i])
+    return runs
+
+class RangeCache:
+    """
+    Read-through cache of remote file blocks on local disk.
+
+    Files are split into fixed `block_size` blocks keyed by URL, validator
+    (the object's ETag) and block number, so a replaced object never serves
+    stale bytes. The missing blocks of a read are fetched with one HTTP range
+    request per contiguous run. The directory is capped at `max_bytes`, least
+    recently used blocks are deleted first, and blocks already on disk (from
+    before a restart or from another worker) are reused.
+    """
+
+    def __init__(self, directory, max_bytes, block_size):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        # block file name -> size, least recently used first
+        self._blocks = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fetched_bytes = 0
+
+        existing = []
+        for name in os.listdir(directory):
+            full_path = os.path.join(directory, name)
+            if name.endswith('.tmp'):
+                continue
+            stat = os.stat(full_path)
+            existing.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(existing):
+            self._blocks[name] = size
+            self.current_bytes += size
+
+    def read(self, url, validator, size, offset, length):
+        """Return bytes [offset, offset + length) of the `size`-byte object at `url`."""
+        end = min(offset + length, size)
+        if offset >= end:
+            return b''
+        block_size = self.block_size
+        first, last = offset // block_size, (end - 1) // block_size
+        prefix = hashlib.sha1(f"{url}|{validator}|{block_size}".encode()).hexdigest()
+
+        blocks, missing = {}, []
+        for i in range(first, last + 1):
+            data = self._load(f"{prefix}_{i}")
+            if data is None:
+                missing.append(i)
+            else:
+                blocks[i] = data
+
+        for run in _runs(missing):
+            start = run[0] * block_size
+            data = _fetch_range(url, validator, start, min((run[-1] + 1) * block_size, size))
+            for n, i in enumerate(run):
+                blocks[i] = data[n * block_size:(n + 1) * block_size]
+                self._store(f"{prefix}_{i}", blocks[i])
+
+        data = b''.join(blocks[i] for i in range(first, last + 1))
+        return data[offset - first * block_size:end - first * block_size]
+
+    def _load(self, name):
+        with self._lock:
+            if name not in self._blocks:
+                self.misses += 1
+                return None
+            self._blocks.move_to_end(name)
+        full_path = os.path.join(self.directory, name)
+        try:
+            with open(full_path, 'rb') as f:
+                data = f.read()
+            # keeps the LRU order across restarts
+            os.utime(full_path)
+        except FileNotFoundError:
+            # evicted by another worker sharing the directory
+            with self._lock:
+                self.current_bytes -= self._blocks.pop(name, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def _store(self, name, data):
+        if len(data) > self.max_bytes:
+            return
+        full_path = os.path.join(self.directory, name)
+        tmp_path = f"{full_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, full_path)
+
+        evicted = []
+        with self._lock:
+            self.current_bytes += len(data) - self._blocks.pop(name, 0)
+            self._blocks[name] = len(data)
+            self.fetched_bytes += len(data)
+            while self.current_bytes > self.max_bytes:
+                old, old_size = self._blocks.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+                evicted.append(old)
+        for old in evicted:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'blocks': len(self._blocks),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'fetched_bytes': self.fetched_bytes,
+            }
+
+def _head(url):
+    """(size, validator) of a remote object from a HEAD request."""
+    head = urllib.request.Request(url, method='HEAD')
+    with urllib.request.urlopen(head, timeout=30) as resp:
+        length = resp.headers.get('Content-Length')
+        if length is None:
+            raise OSError(f"{url}: no Content-Length, can't read it by range")
+        etag = resp.headers.get('ETag')
+        validator = etag.strip('"') if etag else f"{resp.headers.get('Last-Modified')}:{length}"
+        return int(length), validator
+
+def _fetch_range(url, validator, start, stop):
+    request = urllib.request.Request(url, headers={'Range': f"bytes={start}-{stop - 1}"})
+    with urllib.request.urlopen(request, timeout=60) as resp:
+        etag = resp.headers.get('ETag')
+        if etag and etag.strip('"') != validator:
+            raise OSError(f"{url} changed while being read (ETag {etag})")
+        data = resp.read()
+        if resp.status == 200:
+            # server ignored the Range header and sent the whole object
+            data = data[start:stop]
+    if len(data) != stop - start:
+        raise OSError(f"{url}: short read of bytes {start}-{stop - 1}")
+    return data
+
+class _RemoteFile(io.RawIOBase):
+    """Seekable read-only file over a remote object, read through a RangeCache."""
+
+    def __init__(self, cache, url, size, validator):
+        self._cache = cache
+        self._url = url
+        self._size = size
+        self._validator = validator
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer):
+        data = self._cache.read(self._url, self._validator, self._size, self._position, len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+class _CachedHttpHandler(pafs.FileSystemHandler):
+    """Read-only pyarrow filesystem of http(s) URLs served through a RangeCache."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        # url -> (size, validator), looked up once per process like the dataset fingerprint
+        self._objects = {}
+        self._lock = threading.Lock()
+
+    def _object(self, url):
+        with self._lock:
+            if url in self._objects:
+                return self._objects[url]
+        info = _head(url)
+        with self._lock:
+            return self._objects.setdefault(url, info)
+
+    def get_type_name(self):
+        return 'cached-http'
+
+    def normalize_path(self, path):
+        return path
+
+    def get_file_info(self, paths):
+        return [pafs.FileInfo(path, pafs.FileType.File, size=self._object(path)[0]) for path in paths]
+
+    def open_input_file(self, path):
+        size, validator = self._object(path)
+        return pa.PythonFile(_RemoteFile(self.cache, path, size, validator), mode='r')
+
+    def open_input_stream(self, path):
+        return self.open_input_file(path)
+
+    def equals(self, other):
+        return isinstance(other, _CachedHttpHandler) and other.cache is self.cache
+
+    def _read_only(self, *args, **kwargs):
+        raise OSError('cached-http filesystem is read-only')
+
+    get_file_info_selector = create_dir = delete_dir = delete_dir_contents = _read_only
+    delete_root_dir_contents = delete_file = move = copy_file = _read_only
+    open_output_stream = open_append_stream = _read_only
+
+_filesystem = None
+_filesystem_lock = threading.Lock()
+
+def cached_http_filesystem():
+    """
+    Process-wide pyarrow filesystem reading http(s) URLs through the disk
+    range cache, or None when REMOTE_CACHE_DIR is not set.
+    """
+    global _filesystem
+    if not Config.REMOTE_CACHE_DIR:
+        return None
+    with _filesystem_lock:
+        if _filesystem is None:
+            cache = RangeCache(Config.REMOTE_CACHE_DIR, Config.REMOTE_CACHE_MAX_BYTES, Config.REMOTE_CACHE_BLOCK_SIZE)
+            _filesystem = pafs.PyFileSystem(_CachedHttpHandler(cache))
+        return _filesystem
+
+def remote_cache_stats():
+    """Counters of the disk range cache, or None if it is not in use."""
+    if _filesystem is None:
+        return None
+    return _filesystem.handler.cache.stats()
@@ -1,83 +1,773 @@
 
-from flask import Blueprint, request, jsonify, send_file
-from .db import Database
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, Response, current_app, g, request, jsonify, send_file
+from .config import Config
+from .cache import data_flights, oversized_keys, tile_cache
+from .compact import DateAxisError, compact_selection
+from .datasets import UnknownDatasetError
+from .db import DATE_COLUMN_PREFIX, Database
+from .encoding import quantize_displacements
+from .geojson import feature_collection_json
+from .http_cache import make_etag, not_modified, with_cache_headers
+from .metrics import observe_request, render_prometheus
+from .prefetch import ActiveRequests, Prefetcher
+from .profile import LocalProjection, bin_profile, project_onto_line
+from .range_cache import remote_cache_stats
+from .stats import selection_stats
+from .streaming import ARROW_STREAM_MIMETYPE, IPC_COMPRESSION_CODECS, ipc_write_options, stream_query
+from .timing import RequestProfile, current_profile, fetch_arrow_table, timed
 import io
 import json
+import math
+import numpy as np
 import pyarrow as pa
+import pyarrow.compute as pc
+import time
 import traceback
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Workers for /api/tiles; matches the cursor pool so no task waits on a cursor
+_tile_executor = ThreadPoolExecutor(max_workers=Config.DUCKDB_POOL_SIZE, thread_name_prefix='tiles')
+
+# Background warming of neighbouring tiles after a single-tile /api/data request
+# API requests in progress; prefetch jobs wait until there are none
+_active_requests = ActiveRequests()
+_prefetcher = Prefetcher(
+    fetch=lambda params: _prefetch_data_payload(params),
+    skip=lambda params: _data_cache_key(params) in tile_cache or Database.opened(params['dataset']) is None,
+    is_busy=lambda params: len(_active_requests) > 0,
+    max_queued=Config.PREFETCH_QUEUE_SIZE,
+)
+
+# Tile grid of the tiled GeoParquet (see generate_tiled_geoparquet.py)
+GRID_SIZE = 0.06
+# Most detailed LOD tier
+MAX_TIER = 2
+
+# Metric columns that selection endpoints may return
+ALLOWED_METRICS = [
+    'mean_velocity', 'height', 'mean_velocity_std',
+    'los_up', 'los_east', 'los_north', 'rmse',
+    'acceleration', 'seasonality'
+]
+
+@bp.before_request
+def _enter_request():
+    _active_requests.enter()
+    g.active_request = True
+
+@bp.teardown_request
+def _leave_request(exc):
+    if g.pop('active_request', False):
+        _active_requests.leave()
+
+@bp.before_request
+def _start_profile():
+    # profile=1 adds a Server-Timing header; profile=explain also returns the query plans
+    flag = (request.args.get('profile') or '').lower()
+    if current_app.config['PROFILE_ENABLED'] and flag in ('1', 'true', 'explain'):
+        g.profile = RequestProfile(explain=flag == 'explain')
+
+@bp.after_request
+def _finish_profile(response):
+    profile = g.get('profile')
+    if profile is None:
+        return response
+    timings = profile.timings_ms()
+    if profile.explain:
+        # debug envelope describing the response instead of the response itself;
+        # the body is read (running any stream to the end) only to be measured
+        response.direct_passthrough = False
+        envelope = jsonify({
+            'status': response.status_code,
+            'content_type': response.mimetype,
+            'bytes': len(response.get_data()),
+            'x_cache': response.headers.get('X-Cache'),
+            'timings_ms': timings,
+            'queries': profile.queries,
+        })
+        response.close()
+        response = envelope
+    response.headers['Server-Timing'] = profile.server_timing(timings)
+    # lets the frontend read the timings through the Resource Timing API
+    response.headers['Timing-Allow-Origin'] = '*'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers.pop('ETag', None)
+    return response
+
 @bp.route('/dates', methods=['GET'])
 def get_dates():
     try:
-        db = Database()  # Uses GEOPARQUET_PATH from environment only
-        query = "SELECT dates FROM egms_data LIMIT 1"
-        dates_list_objects = db.get_conn().execute(query).fetchone()[0]
-        dates_list_strings = [d.strftime('%Y-%m-%d') for d in dates_list_objects]
-        return jsonify(dates_list_strings)
+        labels = {'route': 'dates'}
+        db = Database(request.args.get('dataset'))
+        etag = make_etag(db.fingerprint, 'dates')
+        cached = not_modified(etag)
+        if cached:
+            observe_request(labels, 'NOT_MODIFIED')
+            return cached
+
+        # read once when the dataset was opened
+        started = time.perf_counter()
+        with timed('serialize'):
+            response = jsonify(db.metadata.dates)
+        observe_request(
+            labels, 'METADATA', serialize_seconds=time.perf_counter() - started,
+            response_bytes=response.content_length, rows=len(db.metadata.dates),
+        )
+        return with_cache_headers(response, etag)
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @bp.route('/data', methods=['GET'])
 def get_data():
     try:
-        db = Database()  # Uses GEOPARQUET_PATH from environment only
-        tile_x = request.args.get('tile_x', type=int)
-        tile_y = request.args.get('tile_y', type=int)
-        date_index = request.args.get('date_index', type=int, default=0)
-        mode = request.args.get('mode', type=str, default='static')
-        target_tier = request.args.get('tier', type=int, default=0)
-        is_3d = request.args.get('is3D') == 'true'
-        latitude_col = request.args.get('latitude_col', 'y')
-        longitude_col = request.args.get('longitude_col', 'x')
-        height_col = request.args.get('height_col', 'height')
-        size_col = request.args.get('size_col', 'mean_velocity')
-        color_col = request.args.get('color_col', 'color')
-        dates_col = request.args.get('dates_col', 'dates')
-        displacements_col = request.args.get('displacements_col', 'displacements')
-
-        db_index = date_index + 1
-
-        base_cols = f"{longitude_col} AS longitude, {latitude_col} AS latitude"
-        if is_3d:
-            base_cols += f", {height_col} AS height, {size_col} AS mean_velocity"
-
-        # add point_id for selection tracking
-        base_cols += ", pid AS point_id"
-
-        if mode == 'animation':
-            selection_col = f"{displacements_col} AS displacements"
-        else:
-            selection_col = f"{displacements_col}[{db_index}] AS displacement"
-        is_global = request.args.get('global') == 'true'
-        if is_global:
-            query = f"""
-            SELECT {base_cols}, {selection_col}
-            FROM egms_data WHERE tier_id = 0
-            """
-            final_params = []
+        try:
+            params = _parse_data_params(request.args)
+        except ValueError:
+            return jsonify({'error': 'bbox must be minx,miny,maxx,maxy'}), 400
+        if not params['is_global'] and params['bbox'] is None and (params['tile_x'] is None or params['tile_y'] is None):
+            return jsonify({'error': 'tile_x and tile_y (or bbox) are required for tiled requests'}), 400
+        error = _validate_data_params(params)
+        if error:
+            return jsonify({'error': error}), 400
+
+        db = Database(params['dataset'])
+        error = _check_data_params(db, params)
+        if error:
+            return jsonify({'error': error}), 400
+        labels = _data_metric_labels(params)
+        cache_key = _data_cache_key(params)
+        etag = make_etag(db.fingerprint, 'data', cache_key)
+        cached = not_modified(etag)
+        if cached:
+            observe_request(labels, 'NOT_MODIFIED')
+            return cached
+
+        if current_app.config['PREFETCH_ENABLED'] and not params['is_global'] and params['bbox'] is None:
+            _prefetcher.submit(_prefetch_jobs(params))
+
+        if _is_empty_tile(db, params):
+            # known from the preloaded metadata; no query needed
+            payload = _empty_data_payload(db, params)
+            observe_request(labels, 'EMPTY', response_bytes=len(payload), rows=0)
+            response = send_file(io.BytesIO(payload), mimetype=ARROW_STREAM_MIMETYPE)
+            response.headers['X-Cache'] = 'EMPTY'
+            return with_cache_headers(response, etag)
+
+        # profiled requests always run (and time) the query, without streaming
+        profile = current_profile()
+        payload = None if profile else tile_cache.get(cache_key)
+        # Global and bbox misses are streamed from DuckDB so the first bytes leave before
+        # the query finishes; they are not coalesced, as waiters would depend on how fast
+        # the first client downloads. Single tiles are built in full and handed to waiters
+        # before they are sent, unless their result was already seen to be too large.
+        single_tile = not params['is_global'] and params['bbox'] is None
+        stream = profile is None and not params['encoding'] and (not single_tile or cache_key in oversized_keys)
+        cache_status = 'HIT'
+        leader = False
+        if payload is None and profile is None and not stream:
+            # Identical concurrent misses wait for the first one's bytes
+            flight, leader = data_flights.join(cache_key)
+            if not leader:
+                payload = data_flights.wait(flight, current_app.config['SINGLE_FLIGHT_TIMEOUT'])
+                cache_status = 'COALESCED'
+        if payload is None:
+            cache_status = 'MISS'
+            try:
+                started = time.perf_counter()
+                date_column = _date_column(db, params)
+                arrow_table = _read_indexed_tile(db, params, date_column)
+                if arrow_table is not None and profile and profile.explain:
+                    # the plan the SQL path would have used, for comparison
+                    query, final_params = _build_data_query(params, db, date_column)
+                    with db.cursor() as cur:
+                        profile.explain_query(cur, query, final_params)
+                if arrow_table is None and stream:
+                    # Stream batches straight from DuckDB, uncoalesced; kept in the
+                    # tile cache once complete if the payload stays small enough
+                    def finish(rows, response_bytes, fetch_seconds, serialize_seconds):
+                        observe_request(
+                            labels, 'MISS', query_seconds=execute_seconds + fetch_seconds,
+                            serialize_seconds=serialize_seconds, response_bytes=response_bytes, rows=rows,
+                        )
+
+                    query, final_params = _build_data_query(params, db, date_column)
+                    chunks = stream_query(
+                        db, query, final_params,
+                        chunk_size=current_app.config['ARROW_STREAM_CHUNK_SIZE'],
+                        on_complete=lambda payload: tile_cache.put(cache_key, payload),
+                        collect_limit=0 if cache_key in oversized_keys else current_app.config['TILE_CACHE_MAX_ENTRY_BYTES'],
+                        compression=params['compression'],
+                        on_finish=finish,
+                    )
+                    execute_seconds = time.perf_counter() - started
+                    response = Response(chunks, mimetype=ARROW_STREAM_MIMETYPE)
+                    response.headers['X-Cache'] = 'MISS'
+                    return with_cache_headers(response, etag)
+                from_query = arrow_table is None
+                if from_query:
+                    query, final_params = _build_data_query(params, db, date_column)
+                    with db.cursor() as cur:
+                        arrow_table = fetch_arrow_table(cur, query, final_params)
+                query_seconds = time.perf_counter() - started
+                started = time.perf_counter()
+                arrow_table = _encode_data_table(arrow_table, params)
+                payload = _serialize_arrow(arrow_table, params['compression'])
+                observe_request(
+                    labels, 'MISS', query_seconds=query_seconds, serialize_seconds=time.perf_counter() - started,
+                    response_bytes=len(payload), rows=arrow_table.num_rows,
+                )
+                if len(payload) <= current_app.config['TILE_CACHE_MAX_ENTRY_BYTES']:
+                    tile_cache.put(cache_key, payload)
+                elif from_query and single_tile and not params['encoding']:
+                    # later requests for it stream instead of building it in memory
+                    oversized_keys.add(cache_key)
+            finally:
+                if leader:
+                    # waiters get the bytes even when they are too large to cache
+                    data_flights.land(flight, payload)
         else:
-            if tile_x is None or tile_y is None:
-                return jsonify({'error': 'tile_x and tile_y are required for tiled requests'}), 400
+            observe_request(labels, cache_status, response_bytes=len(payload))
+
+        response = send_file(io.BytesIO(payload), mimetype=ARROW_STREAM_MIMETYPE)
+        response.headers['X-Cache'] = cache_status
+        return with_cache_headers(response, etag)
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/tiles', methods=['GET'])
+def get_tiles():
+    """
+    Fetch several tiles in one request.
+
+    Takes the /api/data parameters plus `tiles=x,y,tier;x,y,tier;...` and
+    returns one Arrow IPC stream with one record batch per requested tile (in
+    request order). Each batch carries constant `tile_x`, `tile_y` and `tier`
+    columns so the client can split the stream back into tiles.
+    """
+    try:
+        try:
+            tiles = _parse_tile_list(request.args.get('tiles', ''))
+        except ValueError:
+            return jsonify({'error': 'tiles must be a list of x,y,tier triples separated by ";"'}), 400
+        if not tiles:
+            return jsonify({'error': 'tiles is required'}), 400
+        if len(tiles) > current_app.config['MAX_BATCH_TILES']:
+            return jsonify({'error': f"at most {current_app.config['MAX_BATCH_TILES']} tiles per request"}), 400
+
+        try:
+            base_params = _parse_data_params(request.args)
+        except ValueError:
+            return jsonify({'error': 'bbox must be minx,miny,maxx,maxy'}), 400
+        # the batch is addressed by its tile list only
+        base_params.update(is_global=False, bbox=None)
+        error = _validate_data_params(base_params)
+        if error:
+            return jsonify({'error': error}), 400
+        error = _check_data_params(Database(base_params['dataset']), base_params)
+        if error:
+            return jsonify({'error': error}), 400
+        tile_params = [dict(base_params, tile_x=x, tile_y=y, tier=t) for x, y, t in tiles]
+
+        etag = make_etag(Database(base_params['dataset']).fingerprint, 'tiles', tuple(tiles), _data_cache_key(base_params))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        # Misses run concurrently, each on its own pooled cursor
+        # (profiled as one wall-clock fetch stage; worker threads have no request)
+        with timed('fetch'):
+            results = list(_tile_executor.map(_fetch_data_payload, tile_params))
+
+        batches = []
+        for (x, y, t), (payload, _) in zip(tiles, results):
+            table = pa.ipc.open_stream(payload).read_all()
+            # per-tile schema metadata (q16 scale/offset) moves to the batch
+            metadata = table.schema.metadata
+            batch = _tag_tile_batch(table.replace_schema_metadata(None), x, y, t)
+            batches.append((batch, metadata))
+
+        with timed('serialize'):
+            sink = pa.BufferOutputStream()
+            options = ipc_write_options(base_params['compression'])
+            with pa.ipc.RecordBatchStreamWriter(sink, batches[0][0].schema, options=options) as writer:
+                for batch, metadata in batches:
+                    writer.write_batch(batch, custom_metadata=metadata)
+            output_buffer = io.BytesIO(sink.getvalue().to_pybytes())
+        return with_cache_headers(send_file(output_buffer, mimetype=ARROW_STREAM_MIMETYPE), etag)
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/overview', methods=['GET'])
+def get_overview():
+    """
+    Aggregated overview cells for low zooms.
+
+    Picks the finest precomputed grid level whose cells are still at least
+    OVERVIEW_MIN_CELL_PX pixels wide at `zoom` (or an explicit `level`), so
+    the payload over a viewport `bbox` is bounded by screen size rather than
+    by the number of points. Returns an Arrow IPC stream of cell centroids
+    with point_count, mean_velocity and the mean displacement (static) or
+    mean displacement series (animation).
+    """
+    try:
+        db = Database(request.args.get('dataset'))
+        if not db.overview_levels:
+            return jsonify({'error': 'no overview product configured (OVERVIEW_PATH)'}), 404
+
+        zoom = request.args.get('zoom', type=float)
+        level = request.args.get('level', type=int)
+        mode = request.args.get('mode', type=str, default='static')
+        date_index = request.args.get('date_index', type=int, default=0)
+        compression = (request.args.get('compression') or '').lower() or None
+        bbox = request.args.get('bbox')
+
+        if compression and compression not in IPC_COMPRESSION_CODECS:
+            return jsonify({'error': f"compression must be one of {sorted(IPC_COMPRESSION_CODECS)}"}), 400
+        if level is None:
+            if zoom is None:
+                return jsonify({'error': 'zoom or level is required'}), 400
+            level = _overview_level(db.overview_levels, zoom, current_app.config['OVERVIEW_MIN_CELL_PX'])
+        elif level not in [lvl for lvl, _ in db.overview_levels]:
+            return jsonify({'error': f"level must be one of {[lvl for lvl, _ in db.overview_levels]}"}), 400
+        try:
+            bounds = _parse_bbox(bbox) if bbox else None
+        except ValueError:
+            return jsonify({'error': 'bbox must be minx,miny,maxx,maxy'}), 400
+
+        cache_key = (db.name, 'overview', level, bounds, mode, None if mode == 'animation' else date_index, compression)
+        etag = make_etag(db.fingerprint, cache_key)
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        payload = tile_cache.get(cache_key)
+        if payload is None:
+            if mode == 'animation':
+                selection_col = "displacements"
+            else:
+                selection_col = f"displacements[{date_index + 1}] AS displacement"
             query = f"""
-            SELECT {base_cols}, {selection_col}
-            FROM egms_data
-            WHERE tile_x = ? AND tile_y = ? AND tier_id = ?
+            SELECT longitude, latitude, cell_x, cell_y, point_count, mean_velocity, {selection_col}
+            FROM {db.overview_source}
+            WHERE level = ?
             """
-            final_params = [tile_x, tile_y, target_tier]
+            params = [level]
+            if bounds:
+                query += " AND longitude BETWEEN ? AND ? AND latitude BETWEEN ? AND ?"
+                params += [bounds[0], bounds[2], bounds[1], bounds[3]]
+            with db.cursor() as cur:
+                arrow_table = fetch_arrow_table(cur, query, params)
+            payload = _serialize_arrow(arrow_table, compression)
+            tile_cache.put(cache_key, payload)
 
-        arrow_table = db.get_conn().execute(query, final_params).fetch_arrow_table()
+        response = send_file(io.BytesIO(payload), mimetype=ARROW_STREAM_MIMETYPE)
+        response.headers['X-Overview-Level'] = str(level)
+        return with_cache_headers(response, etag)
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
 
-        output_buffer = io.BytesIO()
-        with pa.ipc.RecordBatchStreamWriter(output_buffer, arrow_table.schema) as writer:
-            writer.write_table(arrow_table)
-        output_buffer.seek(0)
-        return send_file(output_buffer, mimetype='application/vnd.apache.arrow.stream')
+def _overview_level(levels, zoom, min_cell_px):
+    """
+    Finest overview level whose cells span at least `min_cell_px` screen
+    pixels at `zoom` (256 px web-mercator tiles); the coarsest if none do.
+    """
+    degrees_per_px = 360 / (256 * 2 ** zoom)
+    fitting = [lvl for lvl, cell_size in levels if cell_size / degrees_per_px >= min_cell_px]
+    if not fitting:
+        return levels[0][0]
+    return max(fitting)
+
+def _parse_bbox(value):
+    """Parse `minx,miny,maxx,maxy` into a tuple of floats."""
+    parts = [float(v) for v in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox needs 4 values')
+    return tuple(parts)
+
+@bp.route('/schema', methods=['GET'])
+def get_schema():
+    """
+    Schema and statistics of a dataset, from metadata read when it was opened:
+    column names and types with footer min/max/null counts, row and row group
+    counts, tile counts and extents per tier, the date axis and the tile grid.
+    """
+    try:
+        db = Database(request.args.get('dataset'))
+        etag = make_etag(db.fingerprint, 'schema')
+        cached = not_modified(etag)
+        if cached:
+            return cached
+        schema = dict(db.metadata.to_json(), dataset=db.name, grid_size=GRID_SIZE)
+        return with_cache_headers(jsonify(schema), etag)
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+@bp.route('/datasets', methods=['GET'])
+def get_datasets():
+    """Configured dataset names (for the `dataset` parameter) and which ones are open."""
+    return jsonify({
+        'default': current_app.config['DEFAULT_DATASET'],
+        'datasets': [{'name': name, 'open': is_open} for name, is_open in Database.dataset_names().items()],
+    })
+
+@bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(dict(
+        tile_cache.stats(),
+        single_flight=data_flights.stats(),
+        prefetch=_prefetcher.stats(),
+        remote=remote_cache_stats(),
+    ))
+
+@bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Request histograms (query and serialization time, response bytes, rows)
+    of this process in the Prometheus text format, for scraping.
+    """
+    return Response(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+def _fetch_data_payload(params, db=None, cache_lookup=True):
+    """
+    Return (arrow_ipc_bytes, cache_hit) for a parsed /api/data request,
+    querying DuckDB and filling the tile cache on a miss. Without
+    `cache_lookup` the cache is not read (nor its hit/miss counted).
+    """
+    cache_key = _data_cache_key(params)
+    payload = None
+    if cache_lookup:
+        payload = tile_cache.get(cache_key)
+        if payload is not None:
+            return payload, True
+
+    db = db or Database(params['dataset'])
+    if _is_empty_tile(db, params):
+        return _empty_data_payload(db, params), True
+
+    flight, leader = data_flights.join(cache_key)
+    if not leader:
+        payload = data_flights.wait(flight, Config.SINGLE_FLIGHT_TIMEOUT)
+        if payload is not None:
+            return payload, True
+
+    try:
+        date_column = _date_column(db, params)
+        arrow_table = _read_indexed_tile(db, params, date_column)
+        if arrow_table is None:
+            query, final_params = _build_data_query(params, db, date_column)
+            with db.cursor() as cur:
+                arrow_table = fetch_arrow_table(cur, query, final_params)
+        arrow_table = _encode_data_table(arrow_table, params)
+        payload = _serialize_arrow(arrow_table, params['compression'])
+        tile_cache.put(cache_key, payload)
+    finally:
+        if leader:
+            data_flights.land(flight, payload)
+    return payload, False
+
+def _data_metric_labels(params):
+    """Metric labels of a parsed /api/data request."""
+    return {
+        'route': 'data',
+        'tier': '' if params['is_global'] else params['tier'],
+        'mode': params['mode'],
+        'global': 'true' if params['is_global'] else 'false',
+    }
+
+def _prefetch_data_payload(params):
+    """
+    Fill the tile cache for prefetch job `params`, unless its dataset has
+    been closed (it is not re-opened) or the tile got cached meanwhile.
+    """
+    db = Database.opened(params['dataset'])
+    if db is None or _data_cache_key(params) in tile_cache:
+        return
+    _fetch_data_payload(params, db, cache_lookup=False)
+
+def _prefetch_jobs(params):
+    """
+    Requests a client is likely to make after tile `params`: the ring of
+    neighbouring tiles at the same tier, then the next tier of the tile
+    itself (submitted last, so it is prefetched first).
+    """
+    x, y, tier = params['tile_x'], params['tile_y'], params['tier']
+    jobs = [
+        dict(params, tile_x=x + dx, tile_y=y + dy)
+        for dx in (-1, 0, 1) for dy in (-1, 0, 1) if dx or dy
+    ]
+    if tier < MAX_TIER:
+        jobs.append(dict(params, tier=tier + 1))
+    return jobs
+
+def _parse_tile_list(value):
+    """Parse `x,y,tier;x,y,tier;...` into a list of int triples."""
+    tiles = []
+    for part in value.split(';'):
+        if not part.strip():
+            continue
+        x, y, t = (int(v) for v in part.split(','))
+        tiles.append((x, y, t))
+    return tiles
+
+def _tag_tile_batch(table, tile_x, tile_y, tier):
+    """Collapse a tile table into one record batch with its tile key columns appended."""
+    n = table.num_rows
+    table = table.append_column('tile_x', pa.array([tile_x] * n, pa.int32()))
+    table = table.append_column('tile_y', pa.array([tile_y] * n, pa.int32()))
+    table = table.append_column('tier', pa.array([tier] * n, pa.int8()))
+    batches = table.combine_chunks().to_batches()
+    if not batches:
+        return pa.RecordBatch.from_pylist([], schema=table.schema)
+    return batches[0]
+
+def _parse_data_params(args):
+    """Read the /api/data query parameters into a plain dict."""
+    return {
+        'tile_x': args.get('tile_x', type=int),
+        'tile_y': args.get('tile_y', type=int),
+        'date_index': args.get('date_index', type=int, default=0),
+        'mode': args.get('mode', type=str, default='static'),
+        'tier': args.get('tier', type=int, default=0),
+        'is_3d': args.get('is3D') == 'true',
+        'is_global': args.get('global') == 'true',
+        'dataset': args.get('dataset') or current_app.config['DEFAULT_DATASET'],
+        # Viewport mode: (minx, miny, maxx, maxy) instead of a single tile
+        'bbox': _parse_bbox(args['bbox']) if args.get('bbox') else None,
+        # Arrow IPC buffer codec requested by the client: lz4, zstd or none
+        'compression': (args.get('compression') or '').lower() or None,
+        # Displacement value encoding: q16 (animation only) or none (float32)
+        'encoding': (args.get('encoding') or '').lower() or None,
+        'columns': {
+            'latitude_col': args.get('latitude_col', 'y'),
+            'longitude_col': args.get('longitude_col', 'x'),
+            'height_col': args.get('height_col', 'height'),
+            'size_col': args.get('size_col', 'mean_velocity'),
+            'color_col': args.get('color_col', 'color'),
+            'dates_col': args.get('dates_col', 'dates'),
+            'displacements_col': args.get('displacements_col', 'displacements'),
+        },
+    }
+
+def _data_cache_key(params):
+    """Cache key for a parsed /api/data request. Animation ignores date_index."""
+    is_animation = params['mode'] == 'animation'
+    single_tile = not params['is_global'] and params['bbox'] is None
+    return (
+        params['dataset'],
+        params['tile_x'] if single_tile else None,
+        params['tile_y'] if single_tile else None,
+        0 if params['is_global'] else params['tier'],
+        params['bbox'],
+        params['mode'],
+        None if is_animation else params['date_index'],
+        params['is_3d'],
+        tuple(sorted(params['columns'].items())),
+        params['compression'],
+        params['encoding'],
+    )
+
+def _validate_data_params(params):
+    """Return an error message for unsupported option values, or None."""
+    if params['compression'] and params['compression'] not in IPC_COMPRESSION_CODECS:
+        return f"compression must be one of {sorted(IPC_COMPRESSION_CODECS)}"
+    if params['encoding'] and params['encoding'] != 'q16':
+        return "encoding must be 'q16'"
+    if params['encoding'] and params['mode'] != 'animation':
+        return "encoding=q16 is only supported with mode=animation"
+    if params['bbox'] is not None:
+        if params['is_global']:
+            return "bbox and global=true are mutually exclusive"
+        min_x, min_y, max_x, max_y = params['bbox']
+        if min_x > max_x or min_y > max_y:
+            return "bbox must be minx,miny,maxx,maxy with min <= max"
+        tx_min, tx_max, ty_min, ty_max = _bbox_to_tile_range(*params['bbox'])
+        max_tiles = current_app.config['MAX_BATCH_TILES']
+        if (tx_max - tx_min + 1) * (ty_max - ty_min + 1) > max_tiles:
+            return f"bbox covers more than {max_tiles} tiles"
+    return None
+
+def _check_data_params(db, params):
+    """
+    Return an error message for a request the dataset can't answer (columns
+    it doesn't have, a date index outside its date axis), or None. Uses the
+    metadata preloaded when the dataset was opened, so no query runs.
+    """
+    cols = params['columns']
+    used = [cols['longitude_col'], cols['latitude_col'], cols['displacements_col']]
+    if params['is_3d']:
+        used += [cols['height_col'], cols['size_col']]
+    missing = db.metadata.missing_columns(used)
+    if missing:
+        return f"unknown column(s): {', '.join(missing)} (see /api/schema)"
+    dates = db.metadata.dates
+    if params['mode'] != 'animation' and dates and not 0 <= params['date_index'] < len(dates):
+        return f"date_index must be between 0 and {len(dates) - 1}"
+    return None
+
+def _is_empty_tile(db, params):
+    """Whether a single-tile request addresses a tile with no points."""
+    if params['is_global'] or params['bbox'] is not None:
+        return False
+    return not db.metadata.has_tile(params['tier'], params['tile_x'], params['tile_y'])
+
+def _empty_data_payload(db, params):
+    """
+    Arrow IPC bytes of an empty /api/data result, with the schema a query
+    would return. Built with a LIMIT 0 query once per response shape; these
+    lookups are internal and not counted in the cache hit/miss stats.
+    """
+    date_column = _date_column(db, params)
+    shape_key = (
+        params['dataset'], 'empty', params['mode'], params['is_3d'], date_column is not None,
+        tuple(sorted(params['columns'].items())), params['compression'], params['encoding'],
+    )
+    payload = tile_cache.get(shape_key, count=False)
+    if payload is None:
+        query, final_params = _build_data_query(params, db, date_column)
+        with db.cursor() as cur:
+            arrow_table = fetch_arrow_table(cur, f"SELECT * FROM ({query}) LIMIT 0", final_params)
+        payload = _serialize_arrow(_encode_data_table(arrow_table, params), params['compression'])
+        tile_cache.put(shape_key, payload)
+    return payload
+
+def _encode_data_table(arrow_table, params):
+    """Apply the requested displacement encoding to a query result."""
+    if params['encoding'] == 'q16':
+        return quantize_displacements(arrow_table, 'displacements')
+    return arrow_table
+
+def _date_column(db, params):
+    """
+    Name of the date-sliced companion column holding the requested date for
+    a static request, or None when the request must use the displacements list.
+    """
+    if params['mode'] == 'animation' or params['columns']['displacements_col'] != 'displacements':
+        return None
+    name = f"{DATE_COLUMN_PREFIX}{params['date_index']:04d}"
+    return name if name in db.date_columns else None
+
+def _build_data_query(params, db=None, date_column=None):
+    """
+    Build the SQL and bind parameters for a parsed /api/data request.
+    With a `date_column`, static requests read that single column from the
+    date-sliced companion file instead of indexing into the displacements list.
+    """
+    cols = params['columns']
+    source = db.date_source if date_column else 'egms_data'
+    db_index = params['date_index'] + 1
+
+    base_cols = f"{cols['longitude_col']} AS longitude, {cols['latitude_col']} AS latitude"
+    if params['is_3d']:
+        base_cols += f", {cols['height_col']} AS height, {cols['size_col']} AS mean_velocity"
+
+    # add point_id for selection tracking
+    base_cols += ", pid AS point_id"
+
+    if params['mode'] == 'animation':
+        selection_col = f"{cols['displacements_col']} AS displacements"
+    elif date_column:
+        selection_col = f"{date_column} AS displacement"
+    else:
+        selection_col = f"{cols['displacements_col']}[{db_index}] AS displacement"
+
+    if params['is_global']:
+        query = f"""
+        SELECT {base_cols}, {selection_col}
+        FROM {source} WHERE tier_id = 0
+        """
+        return query, []
+
+    if params['bbox'] is not None:
+        # The tile range and coordinate range predicates both let DuckDB skip
+        # row groups using their Parquet min/max statistics
+        min_x, min_y, max_x, max_y = params['bbox']
+        query = f"""
+        SELECT {base_cols}, {selection_col}
+        FROM {source}
+        WHERE tile_x BETWEEN ? AND ? AND tile_y BETWEEN ? AND ?
+          AND tier_id <= ?
+          AND {cols['longitude_col']} BETWEEN ? AND ?
+          AND {cols['latitude_col']} BETWEEN ? AND ?
+        """
+        return query, [*_bbox_to_tile_range(*params['bbox']), params['tier'], min_x, max_x, min_y, max_y]
+
+    query = f"""
+    SELECT {base_cols}, {selection_col}
+    FROM {source}
+    WHERE tile_x = ? AND tile_y = ? AND tier_id = ?
+    """
+    return query, [params['tile_x'], params['tile_y'], params['tier']]
+
+def _read_indexed_tile(db, params, date_column=None):
+    """
+    Serve a tile request straight from the row groups listed in the tile
+    index (of the date-sliced companion file when `date_column` is given).
+    Returns None when the request has to go through DuckDB instead
+    (no index, global request, or columns missing from the file).
+    """
+    tile_index = db.date_tile_index if date_column else db.tile_index
+    if tile_index is None or params['is_global'] or params['bbox'] is not None:
+        return None
+
+    cols = params['columns']
+    output = [('longitude', cols['longitude_col']), ('latitude', cols['latitude_col'])]
+    if params['is_3d']:
+        output += [('height', cols['height_col']), ('mean_velocity', cols['size_col'])]
+    output.append(('point_id', 'pid'))
+
+    source_columns = [src for _, src in output] + [date_column or cols['displacements_col']]
+    if not tile_index.has_columns(source_columns):
+        return None
+
+    with timed('fetch'):
+        table = tile_index.read(params['tier'], params['tile_x'], params['tile_y'], source_columns)
+    arrays = [table.column(src) for _, src in output]
+    names = [name for name, _ in output]
+
+    if date_column:
+        arrays.append(table.column(date_column))
+        names.append('displacement')
+        return pa.Table.from_arrays(arrays, names=names)
+
+    displacements = table.column(cols['displacements_col'])
+    if params['mode'] == 'animation':
+        arrays.append(displacements)
+        names.append('displacements')
+    else:
+        # DuckDB semantics: out-of-range index gives NULL instead of an error
+        index = params['date_index']
+        values = pc.list_slice(displacements, index, index + 1)
+        has_value = pc.greater(pc.list_value_length(values), 0)
+        first = pc.list_element(pc.if_else(has_value, values, pa.scalar([0.0], values.type)), 0)
+        arrays.append(pc.if_else(has_value, first, pa.scalar(None, first.type)))
+        names.append('displacement')
+
+    return pa.Table.from_arrays(arrays, names=names)
+
+def _serialize_arrow(arrow_table, compression=None):
+    """Serialize an Arrow table to IPC stream bytes, optionally with compressed buffers."""
+    with timed('serialize'):
+        sink = pa.BufferOutputStream()
+        with pa.ipc.RecordBatchStreamWriter(sink, arrow_table.schema, options=ipc_write_options(compression)) as writer:
+            writer.write_table(arrow_table)
+        return sink.getvalue().to_pybytes()
+
 
 
 def _get_target_tier(zoom):
@@ -89,26 +779,15 @@ def _get_target_tier(zoom):
     else:
         return 2  # 100% data
 
-def _bbox_to_tiles(min_lon, max_lon, min_lat, max_lat, zoom):
+def _bbox_to_tile_range(min_lon, min_lat, max_lon, max_lat):
     """
-    Calculate which grid tiles intersect the bbox at given zoom level.
-    Grid size: 0.06 degrees (matches generate_virtual_tiles.py)
+    Inclusive (tile_x_min, tile_x_max, tile_y_min, tile_y_max) of the grid
+    tiles intersecting the bbox, floored like tile_x/tile_y in the pipeline.
     """
-    grid_size = 0.06
-    
-    # Convert lon/lat to tile indices
-    tile_x_min = int(min_lon / grid_size)
-    tile_x_max = int(max_lon / grid_size)
-    tile_y_min = int(min_lat / grid_size)
-    tile_y_max = int(max_lat / grid_size)
-    
-    # Generate all tile coordinates
-    tiles = []
-    for tx in range(tile_x_min, tile_x_max + 1):
-        for ty in range(tile_y_min, tile_y_max + 1):
-            tiles.append((tx, ty))
-    
-    return tiles
+    return (
+        math.floor(min_lon / GRID_SIZE), math.floor(max_lon / GRID_SIZE),
+        math.floor(min_lat / GRID_SIZE), math.floor(max_lat / GRID_SIZE),
+    )
 
 @bp.route('/select', methods=['POST'])
 def select_by_geometry():
@@ -119,6 +798,9 @@ def select_by_geometry():
     - point_ids: Array of point IDs (PREFERRED - fastest, no spatial query on backend)
     - metrics: Array of metric column names to include (e.g., ["mean_velocity", "height"])
     - geometry: GeoJSON Polygon (legacy, for backward compatibility)
+    - format: "geojson" (default), "compact" (shared date axis + float32 matrix)
+      or "arrow" (Arrow IPC stream of the same columns)
+    - compression: "lz4" or "zstd" buffer compression for format "arrow"
     
     Returns FeatureCollection with full feature data (displacements[], dates[], metadata).
     """
@@ -131,34 +813,41 @@ def select_by_geometry():
         latitude_col = body.get('latitude_col', 'y')
         longitude_col = body.get('longitude_col', 'x')
 
-        db = Database()
+        labels = {'route': 'select', 'mode': body.get('format', 'geojson')}
+        db = Database(body.get('dataset') or request.args.get('dataset'))
+        etag = make_etag(db.fingerprint, 'select', json.dumps(body, sort_keys=True))
+        cached = not_modified(etag)
+        if cached:
+            observe_request(labels, 'NOT_MODIFIED')
+            return cached
 
         # Validate requested metrics against a safelist of allowed columns
-        allowed_metrics = [
-            'mean_velocity', 'height', 'mean_velocity_std', 
-            'los_up', 'los_east', 'los_north', 'rmse', 
-            'acceleration', 'seasonality'
-        ]
-        sanitized_metrics = [m for m in metrics if m in allowed_metrics]
+        sanitized_metrics = [m for m in metrics if m in ALLOWED_METRICS]
 
-        # Define base columns that are always required
+        # Define base columns that are always required, as (output name, source column)
         base_cols = [
-            'pid AS point_id',
-            f'{longitude_col} AS longitude',
-            f'{latitude_col} AS latitude',
-            'displacements',
-            'dates'
+            ('point_id', 'pid'),
+            ('longitude', longitude_col),
+            ('latitude', latitude_col),
+            ('displacements', 'displacements'),
+            ('dates', 'dates'),
         ]
 
         # Add the sanitized metrics to the select columns
-        select_cols_list = base_cols + sanitized_metrics
-        select_cols = ', '.join(select_cols_list)
-        
+        select_cols_list = base_cols + [(m, m) for m in sanitized_metrics]
+
+        output_format = body.get('format', 'geojson')
+        compression = (body.get('compression') or '').lower() or None
+        if output_format not in ('geojson', 'compact', 'arrow'):
+            return jsonify({'error': "format must be 'geojson', 'compact' or 'arrow'"}), 400
+        if compression and compression not in IPC_COMPRESSION_CODECS:
+            return jsonify({'error': f"compression must be one of {sorted(IPC_COMPRESSION_CODECS)}"}), 400
+
         # **NEW APPROACH**: Query by point IDs
         if point_ids and len(point_ids) > 0:
-            placeholders = ','.join(['?' for _ in point_ids])
-            query = f"SELECT {select_cols} FROM egms_data WHERE pid IN ({placeholders})"
-            result = db.get_conn().execute(query, point_ids).fetchall()
+            started = time.perf_counter()
+            result = _select_points(db, point_ids, select_cols_list)
+            query_seconds = time.perf_counter() - started
 
         # **LEGACY**: Query by geometry
         elif geometry:
@@ -168,34 +857,201 @@ def select_by_geometry():
         else:
             return jsonify({'error': 'either point_ids or geometry required'}), 400
 
-        # Build response dynamically
-        features = []
-        # The order of columns in the result will match select_cols_list
-        column_names = [col.split(' AS ')[-1] for col in select_cols_list]
-
-        for row in result:
-            row_dict = dict(zip(column_names, row))
-            
-            # Basic properties
-            props = {
-                'point_id': row_dict.get('point_id'),
-                'displacements': list(row_dict.get('displacements', [])) if row_dict.get('displacements') else [],
-                'dates': [d.strftime('%Y-%m-%d') for d in row_dict.get('dates', [])] if row_dict.get('dates') else [],
-            }
-            
-            # Add requested metrics
-            for metric in sanitized_metrics:
-                value = row_dict.get(metric)
-                props[metric] = float(value) if value is not None else 0
-
-            features.append({
-                'type': 'Feature',
-                'id': row_dict.get('point_id'),
-                'geometry': {'type': 'Point', 'coordinates': [row_dict.get('longitude'), row_dict.get('latitude')]},
-                'properties': props
-            })
-
-        return jsonify({'type': 'FeatureCollection', 'features': features})
+        started = time.perf_counter()
+        if output_format == 'arrow':
+            payload = _serialize_arrow(result, compression)
+        else:
+            with timed('serialize'):
+                if output_format == 'compact':
+                    payload = compact_selection(result, sanitized_metrics)
+                else:
+                    # GeoJSON is assembled column-wise with Arrow string kernels
+                    payload = feature_collection_json(result, sanitized_metrics)
+        observe_request(
+            labels, 'MISS', query_seconds=query_seconds, serialize_seconds=time.perf_counter() - started,
+            response_bytes=len(payload), rows=result.num_rows,
+        )
+        if output_format == 'arrow':
+            response = send_file(io.BytesIO(payload), mimetype=ARROW_STREAM_MIMETYPE)
+        else:
+            response = Response(payload, mimetype='application/json')
+        return with_cache_headers(response, etag)
+    except DateAxisError as e:
+        return jsonify({'error': str(e)}), 400
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
+
+@bp.route('/select/stats', methods=['POST'])
+def select_stats():
+    """
+    Aggregate statistics for a selection, computed on the server.
+
+    Expected JSON:
+    - point_ids: Array of point IDs (same as /api/select)
+    - metrics: Array of metric column names to summarize (safelisted)
+
+    Returns the per-date mean/median/p10/p90/std displacement series and
+    count/mean/median/p10/p90/std/min/max for each requested metric.
+    """
+    try:
+        body = request.get_json()
+        point_ids = body.get('point_ids')
+        metrics = body.get('metrics', [])
+        if not point_ids:
+            return jsonify({'error': 'point_ids required'}), 400
+
+        db = Database(body.get('dataset') or request.args.get('dataset'))
+        etag = make_etag(db.fingerprint, 'select/stats', json.dumps(body, sort_keys=True))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        sanitized_metrics = [m for m in metrics if m in ALLOWED_METRICS]
+        columns = [('displacements', 'displacements'), ('dates', 'dates')]
+        columns += [(m, m) for m in sanitized_metrics]
+        result = _select_points(db, point_ids, columns)
+
+        return with_cache_headers(jsonify(selection_stats(result, sanitized_metrics)), etag)
+    except DateAxisError as e:
+        return jsonify({'error': str(e)}), 400
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/profile', methods=['POST'])
+def line_profile():
+    """
+    Corridor selection and line-profile projection.
+
+    Expected JSON:
+    - line: Array of [lon, lat] vertices (at least 2)
+    - buffer_m: Corridor half-width in metres (default 50)
+    - metrics: Array of metric column names to return (safelisted, default ["mean_velocity"])
+    - max_tier: Highest LOD tier to include (default 2 = all points)
+    - bin_size_m: Optional bin width in metres; adds per-bin metric means
+    - latitude_col / longitude_col: Coordinate columns (default y / x)
+
+    Returns the points inside the corridor sorted by distance along the line,
+    with their signed offset from the line and metric values.
+    """
+    try:
+        body = request.get_json()
+        line = body.get('line') or []
+        buffer_m = float(body.get('buffer_m', 50))
+        metrics = body.get('metrics', ['mean_velocity'])
+        max_tier = int(body.get('max_tier', 2))
+        bin_size_m = body.get('bin_size_m')
+        latitude_col = body.get('latitude_col', 'y')
+        longitude_col = body.get('longitude_col', 'x')
+
+        if len(line) < 2:
+            return jsonify({'error': 'line must have at least 2 [lon, lat] vertices'}), 400
+        if buffer_m <= 0 or (bin_size_m is not None and float(bin_size_m) <= 0):
+            return jsonify({'error': 'buffer_m and bin_size_m must be positive'}), 400
+
+        db = Database(body.get('dataset') or request.args.get('dataset'))
+        etag = make_etag(db.fingerprint, 'profile', json.dumps(body, sort_keys=True))
+        cached = not_modified(etag)
+        if cached:
+            return cached
+
+        sanitized_metrics = [m for m in metrics if m in ALLOWED_METRICS]
+        line_lon = np.array([float(v[0]) for v in line])
+        line_lat = np.array([float(v[1]) for v in line])
+        projection = LocalProjection(line_lon.mean(), line_lat.mean())
+        line_x, line_y = projection.forward(line_lon, line_lat)
+
+        # Candidate points: corridor bbox, pre-filtered on the tile grid
+        dlon, dlat = projection.buffer_degrees(buffer_m)
+        min_lon, max_lon = line_lon.min() - dlon, line_lon.max() + dlon
+        min_lat, max_lat = line_lat.min() - dlat, line_lat.max() + dlat
+        select_cols = ', '.join(
+            ['pid AS point_id', f'{longitude_col} AS longitude', f'{latitude_col} AS latitude']
+            + sanitized_metrics
+        )
+        query = f"""
+        SELECT {select_cols}
+        FROM egms_data
+        WHERE tile_x BETWEEN ? AND ? AND tile_y BETWEEN ? AND ?
+          AND tier_id <= ?
+          AND {longitude_col} BETWEEN ? AND ? AND {latitude_col} BETWEEN ? AND ?
+        """
+        query_params = [
+            *_bbox_to_tile_range(min_lon, min_lat, max_lon, max_lat),
+            max_tier, min_lon, max_lon, min_lat, max_lat,
+        ]
+        with db.cursor() as cur:
+            candidates = fetch_arrow_table(cur, query, query_params)
+
+        x, y = projection.forward(
+            candidates.column('longitude').to_numpy(), candidates.column('latitude').to_numpy()
+        )
+        distance, offset = project_onto_line(x, y, line_x, line_y)
+        inside = np.abs(offset) <= buffer_m
+        order = np.argsort(distance[inside], kind='stable')
+        keep = np.flatnonzero(inside)[order]
+
+        points = candidates.take(pa.array(keep))
+        values = {
+            m: points.column(m).to_numpy(zero_copy_only=False).astype(np.float64)
+            for m in sanitized_metrics
+        }
+        length_m = float(np.sum(np.hypot(np.diff(line_x), np.diff(line_y))))
+        response = {
+            'length_m': length_m,
+            'buffer_m': buffer_m,
+            'count': len(keep),
+            'points': {
+                'point_id': points.column('point_id').to_pylist(),
+                'longitude': points.column('longitude').to_pylist(),
+                'latitude': points.column('latitude').to_pylist(),
+                'distance': distance[keep].tolist(),
+                'offset': offset[keep].tolist(),
+                'metrics': {m: [None if math.isnan(v) else v for v in values[m].tolist()] for m in values},
+            },
+        }
+        if bin_size_m is not None:
+            response['bins'] = bin_profile(distance[keep], values, float(bin_size_m), length_m)
+
+        return with_cache_headers(jsonify(response), etag)
+    except UnknownDatasetError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+def _select_points(db, point_ids, columns):
+    """
+    Fetch the rows of `point_ids` as an Arrow table. `columns` is a list of
+    (output name, source column) pairs.
+
+    Uses the pid index (row groups holding the points only) when available.
+    On a materialized database, small sets are one `pid = ?` probe per id
+    (UNION ALL), the only form DuckDB answers from its ART index; anything
+    else is a semi-join against a registered Arrow table of ids.
+    """
+    names = [name for name, _ in columns]
+    sources = [src for _, src in columns]
+    if db.pid_index is not None and db.pid_index.has_columns(sources):
+        with timed('fetch'):
+            table = db.pid_index.read(point_ids, list(dict.fromkeys(sources)))
+        return pa.Table.from_arrays([table.column(src) for src in sources], names=names)
+
+    select_cols = ', '.join(f'{src} AS {name}' for name, src in columns)
+    with db.cursor() as cur:
+        if db.database_path and len(point_ids) <= current_app.config['SELECT_PID_PROBE_MAX']:
+            unique_ids = list(dict.fromkeys(point_ids))
+            query = ' UNION ALL '.join([f"SELECT {select_cols} FROM egms_data WHERE pid = ?"] * len(unique_ids))
+            return fetch_arrow_table(cur, query, unique_ids)
+
+        cur.register('selected_pids', pa.table({'pid': pa.array(point_ids).cast(db.pid_type)}))
+        try:
+            query = f"SELECT {select_cols} FROM egms_data WHERE pid IN (SELECT pid FROM selected_pids)"
+            return fetch_arrow_table(cur, query)
+        finally:
+            cur.unregister('selected_pids')
@@ -0,0 +1,62 @@
+import math
+import warnings
+
+import numpy as np
+import pyarrow.compute as pc
+
+from .compact import date_axis_matrix
+
+def _to_json_floats(values):
+    """Convert a NumPy array to a list of floats with NaN as None."""
+    return [None if math.isnan(v) else v for v in np.asarray(values, dtype=np.float64).tolist()]
+
+def _summary(values):
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {'count': 0, 'mean': None, 'median': None, 'p10': None, 'p90': None,
+                'std': None, 'min': None, 'max': None}
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    return {
+        'count': int(values.size),
+        'mean': float(values.mean()),
+        'median': float(median),
+        'p10': float(p10),
+        'p90': float(p90),
+        'std': float(values.std()),
+        'min': float(values.min()),
+        'max': float(values.max()),
+    }
+
+def selection_stats(table, metrics):
+    """
+    Aggregate a /api/select result table on the server.
+
+    Returns the per-date mean, median, p10, p90 and (population) std of the
+    displacements across the selected points, plus summary statistics for
+    each requested metric. NaN/missing values are ignored.
+    """
+    dates, values = date_axis_matrix(table)
+    matrix = values.to_numpy().reshape(table.num_rows, len(dates))
+
+    series = {}
+    with warnings.catch_warnings():
+        # dates where every selected point is missing aggregate to NaN (-> null)
+        warnings.simplefilter('ignore', RuntimeWarning)
+        series['mean'] = _to_json_floats(np.nanmean(matrix, axis=0))
+        p10, median, p90 = np.nanpercentile(matrix, [10, 50, 90], axis=0) if table.num_rows else ([],) * 3
+        series['median'] = _to_json_floats(median)
+        series['p10'] = _to_json_floats(p10)
+        series['p90'] = _to_json_floats(p90)
+        series['std'] = _to_json_floats(np.nanstd(matrix, axis=0))
+
+    metric_stats = {}
+    for metric in metrics:
+        column = pc.cast(table.column(metric), 'float64')
+        metric_stats[metric] = _summary(column.to_numpy(zero_copy_only=False).astype(np.float64))
+
+    return {
+        'count': table.num_rows,
+        'dates': dates,
+        'series': series,
+        'metrics': metric_stats,
+    }
@@ -0,0 +1,92 @@
+import io
+import time
+from contextlib import ExitStack
+
+import pyarrow as pa
+
+ARROW_STREAM_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# `compression` request values -> Arrow IPC buffer codecs (LZ4_FRAME / ZSTD)
+IPC_COMPRESSION_CODECS = {'lz4': 'lz4', 'zstd': 'zstd'}
+
+def ipc_write_options(compression=None):
+    """IPC writer options for a `compression` request value (None = uncompressed)."""
+    return pa.ipc.IpcWriteOptions(compression=IPC_COMPRESSION_CODECS.get(compression))
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that collects what the IPC writer emits until drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+def stream_query(db, query, params, chunk_size, on_complete=None, collect_limit=0, compression=None, on_finish=None):
+    """
+    Run `query` on a pooled cursor and return a generator of Arrow IPC stream
+    chunks, one per record batch of at most `chunk_size` rows, with optional
+    `compression` of the batch buffers.
+
+    The query is executed before this returns, so SQL errors still surface as
+    normal exceptions; the cursor is held until the generator finishes or is
+    closed. If `on_complete` is given, it is called with the full payload once
+    the stream ends, as long as the payload stayed within `collect_limit` bytes.
+    If `on_finish` is given, it is called at the end of a complete stream with
+    (rows, bytes, fetch_seconds, serialize_seconds); the times exclude the
+    time spent waiting on the client between chunks.
+    """
+    stack = ExitStack()
+    cur = stack.enter_context(db.cursor())
+    try:
+        reader = cur.execute(query, params).fetch_record_batch(chunk_size)
+    except BaseException:
+        stack.close()
+        raise
+
+    def generate():
+        with stack:
+            collected = [] if on_complete else None
+            collected_bytes = 0
+            rows, total_bytes, fetch_seconds, serialize_seconds = 0, 0, 0.0, 0.0
+            sink = _ChunkSink()
+            with pa.ipc.new_stream(sink, reader.schema, options=ipc_write_options(compression)) as writer:
+                batches = iter(reader)
+                while True:
+                    started = time.perf_counter()
+                    batch = next(batches, None)
+                    fetched = time.perf_counter()
+                    fetch_seconds += fetched - started
+                    if batch is None:
+                        break
+                    writer.write_batch(batch)
+                    chunk = sink.drain()
+                    serialize_seconds += time.perf_counter() - fetched
+                    rows += batch.num_rows
+                    total_bytes += len(chunk)
+                    if collected is not None:
+                        collected_bytes += len(chunk)
+                        if collected_bytes <= collect_limit:
+                            collected.append(chunk)
+                        else:
+                            collected = None
+                    yield chunk
+            # schema-only streams and the end-of-stream marker
+            chunk = sink.drain()
+            if collected is not None and collected_bytes + len(chunk) <= collect_limit:
+                collected.append(chunk)
+                on_complete(b''.join(collected))
+            if on_finish:
+                on_finish(rows, total_bytes + len(chunk), fetch_seconds, serialize_seconds)
+            yield chunk
+
+    return generate()
@@ -0,0 +1,72 @@
+import os
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+KEY_COLUMNS = ['tier_id', 'tile_x', 'tile_y']
+
+class TileIndex:
+    """
+    In-memory map of (tier_id, tile_x, tile_y) -> row group slices of a local GeoParquet file.
+
+    Built once with a scan of the three small key columns. Because the pipeline
+    sorts rows by tier and Hilbert index, a tile usually lives in a handful of
+    row groups, so reads touch only those groups and skip SQL planning.
+    """
+
+    def __init__(self, path, metadata, entries):
+        self.path = path
+        self.metadata = metadata
+        self.schema = metadata.schema.to_arrow_schema()
+        # {(tier, x, y): [(row_group, first_row, last_row_exclusive), ...]}
+        self._entries = entries
+
+    @classmethod
+    def build(cls, path):
+        """Scan the key columns of `path` and return a TileIndex, or None for remote files."""
+        if not os.path.isfile(path):
+            return None
+
+        pf = pq.ParquetFile(path)
+        if any(col not in pf.schema_arrow.names for col in KEY_COLUMNS):
+            return None
+
+        entries = {}
+        for rg in range(pf.metadata.num_row_groups):
+            keys = pf.read_row_group(rg, columns=KEY_COLUMNS)
+            keys = keys.append_column('row', pa.array(range(keys.num_rows), pa.int64()))
+            ranges = keys.group_by(KEY_COLUMNS).aggregate([('row', 'min'), ('row', 'max')])
+            for tier, x, y, first, last in zip(*(ranges.column(c).to_pylist() for c in
+                                                 KEY_COLUMNS + ['row_min', 'row_max'])):
+                entries.setdefault((tier, x, y), []).append((rg, first, last + 1))
+
+        return cls(path, pf.metadata, entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def has_columns(self, columns):
+        return all(col in self.schema.names for col in columns)
+
+    def read(self, tier, tile_x, tile_y, columns):
+        """
+        Read the rows of one tile, limited to `columns`. Returns an empty
+        table with the requested schema when the tile has no points.
+        """
+        slices = self._entries.get((tier, tile_x, tile_y))
+        if not slices:
+            return self.schema.empty_table().select(columns)
+
+        read_columns = list(dict.fromkeys(columns + KEY_COLUMNS))
+        # reuse the parsed footer instead of reading it again
+        pf = pq.ParquetFile(self.path, metadata=self.metadata)
+        parts = []
+        for rg, first, stop in slices:
+            part = pf.read_row_group(rg, columns=read_columns).slice(first, stop - first)
+            mask = pc.and_(
+                pc.and_(pc.equal(part['tier_id'], tier), pc.equal(part['tile_x'], tile_x)),
+                pc.equal(part['tile_y'], tile_y),
+            )
+            parts.append(part.filter(mask).select(columns))
+        return pa.concat_tables(parts)
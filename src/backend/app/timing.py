@@ -0,0 +1,85 @@
+import time
+from contextlib import contextmanager
+
+from flask import g, has_request_context
+
+# Server-Timing metrics in report order; `total` (the whole request) is added last
+STAGES = ('db-connect', 'plan', 'execute', 'fetch', 'serialize')
+
+class RequestProfile:
+    """
+    Stage timings of one `profile=1` request, reported as a Server-Timing
+    header. With `explain`, the EXPLAIN ANALYZE output of every query the
+    request ran is kept as well.
+    """
+
+    def __init__(self, explain=False):
+        self.explain = explain
+        self.started = time.perf_counter()
+        # stage -> seconds, summed over repeated stages (e.g. two queries)
+        self.durations = {}
+        # [{'sql', 'params', 'plan'}]
+        self.queries = []
+
+    def add(self, stage, seconds):
+        self.durations[stage] = self.durations.get(stage, 0.0) + seconds
+
+    def explain_query(self, cur, query, params=None):
+        """Run EXPLAIN ANALYZE of `query` on `cur` and keep its output."""
+        rows = cur.execute(f"EXPLAIN ANALYZE {query}", params).fetchall()
+        self.queries.append({
+            'sql': query,
+            'params': list(params or []),
+            'plan': '\n'.join(row[-1] for row in rows),
+        })
+
+    def timings_ms(self):
+        ordered = [stage for stage in STAGES if stage in self.durations]
+        ordered += [stage for stage in self.durations if stage not in STAGES]
+        timings = {stage: round(self.durations[stage] * 1000, 3) for stage in ordered}
+        timings['total'] = round((time.perf_counter() - self.started) * 1000, 3)
+        return timings
+
+    def server_timing(self, timings=None):
+        """Server-Timing header value of `timings` (default: the timings so far)."""
+        timings = timings or self.timings_ms()
+        return ', '.join(f"{stage};dur={ms}" for stage, ms in timings.items())
+
+def current_profile():
+    """The RequestProfile of the current request, or None (not profiled, or outside a request)."""
+    if not has_request_context():
+        return None
+    return g.get('profile')
+
+@contextmanager
+def timed(stage):
+    """Add the time spent in the block to `stage` of the current request's profile, if any."""
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(stage, time.perf_counter() - started)
+
+def fetch_arrow_table(cur, query, params=None):
+    """
+    `cur.execute(query, params).fetch_arrow_table()`. When the request is
+    profiled, planning is timed with a separate EXPLAIN of the query, then
+    execute and fetch are timed on their own, and with `explain` the query
+    is run once more under EXPLAIN ANALYZE.
+    """
+    profile = current_profile()
+    if profile is None:
+        return cur.execute(query, params).fetch_arrow_table()
+    with timed('plan'):
+        cur.execute(f"EXPLAIN {query}", params).fetchall()
+    with timed('execute'):
+        result = cur.execute(query, params)
+    with timed('fetch'):
+        table = result.fetch_arrow_table()
+    if profile.explain:
+        profile.explain_query(cur, query, params)
+    return table
@@ -0,0 +1,22 @@
+"""
+Gunicorn settings, picked up automatically when gunicorn is started from this
+directory. Command-line flags (e.g. --bind, --workers) still take precedence.
+
+The default serving mode is a single process with a pool of request threads
+(gthread). DuckDB releases the GIL while a query executes, so the threads run
+queries in parallel on pooled cursors of one shared connection, and the
+process keeps one tile cache, row group index and DuckDB catalog instead of
+one copy per sync worker.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', 1))
+# Requests beyond DUCKDB_POOL_SIZE wait for a free cursor; the extra threads
+# keep answering cache hits and 304s in the meantime
+threads = int(os.environ.get('GUNICORN_THREADS', 2 * int(os.environ.get('DUCKDB_POOL_SIZE', 8))))
+# Cold tier-2 tiles and large selections on a remote file can take a while
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+# Each worker opens its own DuckDB connection after the fork
+preload_app = False
@@ -0,0 +1,68 @@
+"""
+Failure handling of background tile prefetches.
+
+Run from src/backend with `python -m pytest tests`. No dataset is opened:
+the Database and the tile read are replaced with stubs.
+"""
+import threading
+
+import pytest
+
+from app import routes
+from app.cache import data_flights, tile_cache
+
+PARAMS = {
+    'dataset': 'default', 'tile_x': 238, 'tile_y': 833, 'tier': 0, 'is_global': False,
+    'bbox': None, 'mode': 'static', 'date_index': 0, 'is_3d': False,
+    'columns': {'displacements_col': 'displacements'}, 'compression': None, 'encoding': None,
+}
+
+class _StubDatabase:
+    date_columns = ()
+
+    @classmethod
+    def opened(cls, name):
+        return cls()
+
+@pytest.fixture
+def stub_dataset(monkeypatch):
+    monkeypatch.setattr(routes, 'Database', _StubDatabase)
+    monkeypatch.setattr(routes, '_is_empty_tile', lambda db, params: False)
+    tile_cache.clear()
+    yield
+    tile_cache.clear()
+
+def test_failed_prefetch_lands_its_flight(stub_dataset, monkeypatch):
+    def failing_read(db, params, date_column):
+        raise RuntimeError('read failed')
+
+    monkeypatch.setattr(routes, '_read_indexed_tile', failing_read)
+    with pytest.raises(RuntimeError):
+        routes._prefetch_data_payload(dict(PARAMS))
+    assert data_flights.stats()['in_flight'] == 0
+
+def test_request_after_failed_prefetch_does_not_wait(stub_dataset, monkeypatch):
+    calls = []
+
+    def flaky_read(db, params, date_column):
+        calls.append(params)
+        if len(calls) == 1:
+            raise RuntimeError('read failed')
+        return routes.pa.table({'pid': ['a']})
+
+    monkeypatch.setattr(routes, '_read_indexed_tile', flaky_read)
+    monkeypatch.setattr(routes.Config, 'SINGLE_FLIGHT_TIMEOUT', 30)
+    with pytest.raises(RuntimeError):
+        routes._prefetch_data_payload(dict(PARAMS))
+
+    done = threading.Event()
+    result = []
+
+    def fetch():
+        result.append(routes._fetch_data_payload(dict(PARAMS), _StubDatabase()))
+        done.set()
+
+    threading.Thread(target=fetch, daemon=True).start()
+    assert done.wait(5), 'request waited on the flight of the failed prefetch'
+    payload, cache_hit = result[0]
+    assert payload and not cache_hit
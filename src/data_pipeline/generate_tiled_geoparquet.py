@@ -16,6 +16,23 @@ GRID_SIZE = 0.06
 # It ensures row groups are small enough (~1-2MB) for browser HTTP Range requests.
 ROW_GROUP_SIZE = 12288
 
+# Optional time-major companion file for static-mode queries.
+# Same rows, order and scalar columns as the main file, but `displacements` is
+# split into one FLOAT column per date (disp_0000, disp_0001, ...), so a query
+# for a single date reads one narrow column instead of decoding every list.
+# Point the backend at it with GEOPARQUET_DATES_PATH.
+WRITE_DATE_SIDECAR = False
+DATE_SIDECAR_PATH = OUTPUT_PARQUET_PATH.replace('.geoparquet', '_by_date.parquet')
+DATE_COLUMN_PREFIX = 'disp_'
+
+# Optional aggregated overview product for low zooms (served by /api/overview).
+# Points are binned into square grid cells at several resolutions; each cell
+# carries its point count, centroid, mean velocity and per-date mean displacement.
+# Cell sizes are in degrees, coarsest first, and must be integer multiples of the finest.
+WRITE_OVERVIEW = False
+OVERVIEW_PATH = OUTPUT_PARQUET_PATH.replace('.geoparquet', '_overview.parquet')
+OVERVIEW_CELL_SIZES = [0.04, 0.01, 0.0025]
+
 def generate_data():
     print(f"--- Starting Single-File Optimization (Grid: {GRID_SIZE}) ---")
     start_time = time.time()
@@ -129,6 +146,12 @@ def generate_data():
         """)
 
         print(f"✅ Success! File created.")
+
+        if WRITE_DATE_SIDECAR:
+            generate_date_sidecar(con)
+
+        if WRITE_OVERVIEW:
+            generate_overview(con)
         print(f"⏱️  Time taken: {time.time() - start_time:.2f} s")
 
     except Exception as e:
@@ -138,5 +161,115 @@ def generate_data():
     finally:
         con.close()
 
+def generate_date_sidecar(con):
+    """Write the time-major companion file next to the optimized parquet."""
+    print(f"3. Writing Date-Sliced Companion to: {DATE_SIDECAR_PATH}")
+
+    num_dates = con.execute(f"""
+        SELECT MAX(len(displacements)) FROM read_parquet('{OUTPUT_PARQUET_PATH}')
+    """).fetchone()[0] or 0
+    print(f"   - Date columns: {num_dates}")
+
+    # DuckDB lists are 1-based; column names are 0-based like the API's date_index
+    date_columns = ',\n            '.join(
+        f"displacements[{i + 1}] AS {DATE_COLUMN_PREFIX}{i:04d}" for i in range(num_dates)
+    )
+
+    # Reading the optimized file back keeps its tier/Hilbert row order
+    con.execute(f"""
+    COPY (
+        SELECT
+            * EXCLUDE (dates, displacements),
+            {date_columns}
+        FROM read_parquet('{OUTPUT_PARQUET_PATH}')
+    ) TO '{DATE_SIDECAR_PATH}' (
+        FORMAT PARQUET,
+        ROW_GROUP_SIZE {ROW_GROUP_SIZE},
+        COMPRESSION ZSTD
+    );
+    """)
+
+def generate_overview(con):
+    """Write the multi-resolution aggregated overview next to the optimized parquet."""
+    print(f"4. Writing Aggregated Overview to: {OVERVIEW_PATH}")
+    print(f"   - Cell sizes: {OVERVIEW_CELL_SIZES}")
+
+    finest = OVERVIEW_CELL_SIZES[-1]
+
+    # Aggregate once at the finest resolution; coarser levels are roll-ups of
+    # these sums, so the per-date unnest happens only once.
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE overview_fine_points AS
+    SELECT
+        FLOOR(x / {finest})::BIGINT AS fx,
+        FLOOR(y / {finest})::BIGINT AS fy,
+        COUNT(*) AS n,
+        SUM(x) AS sx,
+        SUM(y) AS sy,
+        SUM(mean_velocity) AS sv,
+        COUNT(mean_velocity) AS nv
+    FROM read_parquet('{OUTPUT_PARQUET_PATH}')
+    GROUP BY ALL
+    """)
+    con.execute(f"""
+    CREATE OR REPLACE TEMP TABLE overview_fine_series AS
+    SELECT fx, fy, i, SUM(v) AS s, COUNT(v) AS c
+    FROM (
+        SELECT
+            FLOOR(x / {finest})::BIGINT AS fx,
+            FLOOR(y / {finest})::BIGINT AS fy,
+            UNNEST(range(len(displacements))) AS i,
+            UNNEST(displacements) AS v
+        FROM read_parquet('{OUTPUT_PARQUET_PATH}')
+    )
+    GROUP BY ALL
+    """)
+
+    levels = []
+    for level, cell_size in enumerate(OVERVIEW_CELL_SIZES):
+        factor = round(cell_size / finest)
+        levels.append(f"""
+        SELECT
+            {level}::UTINYINT AS level,
+            {cell_size}::DOUBLE AS cell_size,
+            p.cell_x, p.cell_y,
+            (p.sx / p.n)::FLOAT AS longitude,
+            (p.sy / p.n)::FLOAT AS latitude,
+            p.n::UINTEGER AS point_count,
+            (p.sv / NULLIF(p.nv, 0))::FLOAT AS mean_velocity,
+            s.displacements
+        FROM (
+            SELECT
+                FLOOR(fx / {factor})::INTEGER AS cell_x,
+                FLOOR(fy / {factor})::INTEGER AS cell_y,
+                SUM(n) AS n, SUM(sx) AS sx, SUM(sy) AS sy, SUM(sv) AS sv, SUM(nv) AS nv
+            FROM overview_fine_points
+            GROUP BY ALL
+        ) p
+        JOIN (
+            SELECT cell_x, cell_y, LIST((s / NULLIF(c, 0))::FLOAT ORDER BY i) AS displacements
+            FROM (
+                SELECT
+                    FLOOR(fx / {factor})::INTEGER AS cell_x,
+                    FLOOR(fy / {factor})::INTEGER AS cell_y,
+                    i, SUM(s) AS s, SUM(c) AS c
+                FROM overview_fine_series
+                GROUP BY ALL
+            )
+            GROUP BY ALL
+        ) s USING (cell_x, cell_y)
+        """)
+
+    con.execute(f"""
+    COPY (
+        {' UNION ALL '.join(levels)}
+        ORDER BY level, cell_y, cell_x
+    ) TO '{OVERVIEW_PATH}' (
+        FORMAT PARQUET,
+        ROW_GROUP_SIZE {ROW_GROUP_SIZE},
+        COMPRESSION ZSTD
+    );
+    """)
+
 if __name__ == "__main__":
     generate_data()
\ No newline at end of file